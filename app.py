@@ -1,27 +1,171 @@
-from flask import Flask, render_template, request, redirect, url_for, flash
-from flask_mail import Mail, Message
+import startup
 import os
-from dotenv import load_dotenv
+import time
 
-# Load environment variables
-load_dotenv()
+with startup.phase('import flask'):
+    from flask import Flask, render_template, request, redirect, url_for, flash
+
+from config import dotenv_path, env_flag, load_env
+from contact_guard import ContactGuard, normalize_form
+from content import load_content
+from email_templates import EmailTemplates
+from env_cli import env_cli
+from fast_signals import install_flask_signals
+from form_ingest import FormIngest
+from health import HealthProbes, ReadinessChecker, SMTPDiagnostics
+from log_pipeline import setup_logging
+from mailer import LazyMail
+from request_metrics import RequestMetrics
+from routing import CachedMap
+from sampling_profiler import SamplingProfilerMiddleware
+from server_session import ServerSideSessions
+from settings import SettingsStore
+from static_files import StaticFiles
+from template_profiler import TemplateProfiler
+
+# Load environment variables (.env path is resolved once and cached)
+with startup.phase('load .env'):
+    load_env()
+
+# Immutable settings snapshot, swapped when .env changes (no restart needed
+# to rotate credentials); hot paths read settings.current
+settings = SettingsStore(dotenv_path(), interval=float(os.getenv('SETTINGS_POLL_INTERVAL', 2)))
+
+# Structured JSON-lines logging, written by a background thread
+log = setup_logging(
+    'portfolio',
+    level=os.getenv('LOG_LEVEL', 'INFO').upper(),
+    sample_rate=float(os.getenv('LOG_SAMPLE_RATE', 1.0)),
+    rate=float(os.getenv('LOG_RATE_LIMIT')) if os.getenv('LOG_RATE_LIMIT') else None
+)
+
+# Flask's per-request signals dispatch from a cached receiver list
+install_flask_signals()
 
 # Initialize Flask app
-app = Flask(__name__)
-app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'your-secret-key-here')
+class PortfolioFlask(Flask):
+    # Memoizes url_for() results; templates build the same URLs on every render
+    url_map_class = CachedMap
+
+
+app = PortfolioFlask(__name__)
+app.config['SECRET_KEY'] = settings.current.secret_key
+
+# With SESSION_DB set (a SQLite file every worker can reach), session data
+# stays on the server and the cookie only carries a signed id
+app.config['SESSION_DB'] = os.getenv('SESSION_DB')
+server_sessions = ServerSideSessions(app)
+
+
+# Opt-in per-route latency histograms (Server-Timing headers + /_metrics)
+app.config['REQUEST_METRICS'] = env_flag('REQUEST_METRICS')
+request_metrics = RequestMetrics(app)
+
+# Opt-in sampling profiler; collapsed stacks download from /_profiler/flamegraph
+if env_flag('SAMPLING_PROFILER'):
+    app.wsgi_app = SamplingProfilerMiddleware(
+        app.wsgi_app,
+        sample_rate=float(os.getenv('SAMPLING_PROFILER_RATE', 0.01)),
+        mode=os.getenv('SAMPLING_PROFILER_MODE', 'stack'),
+        interval=float(os.getenv('SAMPLING_PROFILER_INTERVAL', 0.005))
+    )
+
+# Serve /static from an in-memory index, outside the Flask request context
+app.config['STATIC_MEMORY_LIMIT'] = int(os.getenv('STATIC_MEMORY_LIMIT', 256 * 1024))
+with startup.phase('index static'):
+    app.wsgi_app = StaticFiles(
+        app.wsgi_app,
+        app.static_folder,
+        app.static_url_path,
+        max_memory_size=app.config['STATIC_MEMORY_LIMIT'],
+        max_age=app.config['SEND_FILE_MAX_AGE_DEFAULT']
+    )
 
 
 # FLASK-MAIL CONFIGURATION FOR GMAIL
-app.config['MAIL_SERVER'] = 'smtp.gmail.com'
-app.config['MAIL_PORT'] = 587
-app.config['MAIL_USE_TLS'] = True
-app.config['MAIL_USE_SSL'] = False
-app.config['MAIL_USERNAME'] = os.getenv('GMAIL_USER')
-app.config['MAIL_PASSWORD'] = os.getenv('GMAIL_APP_PASSWORD')
-app.config['MAIL_DEFAULT_SENDER'] = os.getenv('GMAIL_USER')
+def apply_mail_settings(current):
+    app.config['MAIL_SERVER'] = current.mail_server
+    app.config['MAIL_PORT'] = current.mail_port
+    app.config['MAIL_USE_TLS'] = current.mail_use_tls
+    app.config['MAIL_USE_SSL'] = False
+    app.config['MAIL_USERNAME'] = current.gmail_user
+    app.config['MAIL_PASSWORD'] = current.gmail_app_password
+    app.config['MAIL_DEFAULT_SENDER'] = current.gmail_user
+
+apply_mail_settings(settings.current)
+
+# Initialize Flask-Mail (flask_mail, smtplib and email.* load on first send)
+mail = LazyMail(app)
+
+# Notification bodies from templates/email, compiled once on first use
+email_templates = EmailTemplates(app)
+
+@settings.subscribe
+def settings_changed(old, new):
+    app.config['SECRET_KEY'] = new.secret_key
+    apply_mail_settings(new)
+    mail.reset()
+    smtp_diagnostics.invalidate()
+    log.info("Settings reloaded", extra={'changed': [f for f in new._fields if getattr(old, f) != getattr(new, f)]})
+
+if env_flag('SETTINGS_RELOAD', True):
+    settings.watch()
+
+# /healthz (liveness) and /readyz (cached SMTP reachability + outbox depth),
+# answered outside Flask from prebuilt responses
+readiness = ReadinessChecker(
+    app,
+    mail,
+    interval=float(os.getenv('READINESS_INTERVAL', 30)),
+    max_outbox=int(os.getenv('READINESS_MAX_OUTBOX', 50))
+)
+app.wsgi_app = HealthProbes(app.wsgi_app, readiness)
+
+# /test-email: cached login check (no mail sent), refreshed in the background
+smtp_diagnostics = SMTPDiagnostics(app, ttl=float(os.getenv('SMTP_DIAGNOSTICS_TTL', 60)))
+
+# Opt-in template render profiling (Server-Timing headers + JSON report)
+app.config['TEMPLATE_PROFILING'] = env_flag('TEMPLATE_PROFILING')
+template_profiler = TemplateProfiler(app)
+
+# Certificates and testimonials are parsed once here and indexed for filtering
+app.config['CERTIFICATES_PER_PAGE'] = int(os.getenv('CERTIFICATES_PER_PAGE', 6))
+with startup.phase('load content'):
+    content = load_content()
 
-# Initialize Flask-Mail
-mail = Mail(app)
+# Contact form bodies are parsed incrementally; oversized ones get a 413. The
+# field limits are characters and also go into the form's maxlength
+# attributes; the body limit fits every field at its maxlength in any script.
+app.config['FEEDBACK_MAX_BYTES'] = int(os.getenv('FEEDBACK_MAX_BYTES', 256 * 1024))
+feedback_form = FormIngest(
+    {'name': 200, 'email': 320, 'subject': 300, 'message': 20000, 'website': 200},
+    max_content_length=app.config['FEEDBACK_MAX_BYTES']
+)
+
+# Per-client and per-sender rate limits, spam checks and duplicate detection,
+# all before any mail work
+app.config['CONTACT_GUARD_CLIENT_LIMIT'] = int(os.getenv('CONTACT_GUARD_CLIENT_LIMIT', 5))
+app.config['CONTACT_GUARD_EMAIL_LIMIT'] = int(os.getenv('CONTACT_GUARD_EMAIL_LIMIT', 3))
+app.config['CONTACT_GUARD_WINDOW'] = int(os.getenv('CONTACT_GUARD_WINDOW', 3600))
+app.config['CONTACT_GUARD_DB'] = os.getenv('CONTACT_GUARD_DB')
+app.config['CONTACT_DEDUP_TTL'] = int(os.getenv('CONTACT_DEDUP_TTL', 600))
+contact_guard = ContactGuard(app)
+
+# Behind a reverse proxy / load balancer, set TRUSTED_PROXIES to the number of
+# proxies in front of the app so request.remote_addr (the per-client rate
+# limit key) is the visitor's address taken from X-Forwarded-For. Left at 0,
+# the header is ignored, since anyone could send it.
+app.config['TRUSTED_PROXIES'] = int(os.getenv('TRUSTED_PROXIES', 0))
+if app.config['TRUSTED_PROXIES']:
+    from werkzeug.middleware.proxy_fix import ProxyFix
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['TRUSTED_PROXIES'],
+                            x_proto=app.config['TRUSTED_PROXIES'])
+
+# `flask env set KEY=VALUE ... [-u KEY]` / `flask env unset KEY ...`
+app.cli.add_command(env_cli)
+
+if env_flag('STARTUP_TIMINGS'):
+    startup.report()
 
 
 #routes
@@ -39,99 +183,83 @@ def about():
 
 @app.route('/certificates')
 def certificates():
-    return render_template('certificates.html')
+    skill = request.args.get('skill') or None
+    category = request.args.get('category') or None
+    page = content.paginate_certificates(
+        skill=skill,
+        category=category,
+        page=request.args.get('page', 1, type=int),
+        per_page=app.config['CERTIFICATES_PER_PAGE']
+    )
+    return render_template('certificates.html', page=page, tags=content.tags,
+                           skill=skill, category=category)
 
 @app.route('/testimonials')
 def testimonials():
-    return render_template('testimonials.html')
+    return render_template('testimonials.html', testimonials=content.testimonials)
 
 @app.route('/feedback', methods=['GET', 'POST'])
 def feedback():
     if request.method == 'POST':
         # Get form data
-        name = request.form.get('name', '').strip()
-        email = request.form.get('email', '').strip()
-        subject = request.form.get('subject', '').strip()
-        message = request.form.get('message', '').strip()
+        contact_guard.check_client(request.remote_addr)
+        form = normalize_form(feedback_form.parse(request))
+        name = form.get('name', '')
+        email = form.get('email', '')
+        subject = form.get('subject', '')
+        message = form.get('message', '')
         
         # Validate inputs
         if not all([name, email, subject, message]):
-            print("❌ Missing form fields")
+            log.info("Contact form rejected: missing fields")
+            return redirect(url_for('fail'))
+        
+        spam_reason = contact_guard.check_form(form)
+        if spam_reason:
+            log.info("Contact form rejected as spam", extra={'reason': spam_reason})
             return redirect(url_for('fail'))
         
+        # A double submit or replay of the same message was already sent
+        submission = contact_guard.claim_submission(form)
+        if submission is None:
+            log.info("Duplicate contact form submission", extra={'visitor_email': email})
+            return redirect(url_for('sent'))
+        
         try:
-            print(f"📧 Sending email from contact form...")
-            print(f"📧 Visitor: {name} ({email})")
+            log.info("Sending contact form email", extra={'visitor': name, 'visitor_email': email})
             
             # Create email message
-            msg = Message(
+            msg = mail.message(
                 subject=f"Portfolio Contact: {subject}",
                 sender=app.config['MAIL_DEFAULT_SENDER'],
-                recipients=[os.getenv('GMAIL_USER')],
+                recipients=[settings.current.gmail_user],
                 reply_to=email
             )
             
-            # Email body
-            msg.body = f"""
-New Contact Form Submission
-
-From: {name}
-Email: {email}
-Subject: {subject}
-
-Message:
-{message}
-
----
-Reply directly to: {email}
-            """
-            
-            # HTML email (optional but looks better)
-            msg.html = f"""
-            <html>
-            <body style="font-family: Arial, sans-serif; padding: 20px; background-color: #f4f4f4;">
-                <div style="max-width: 600px; margin: 0 auto; background: white; padding: 30px; border-radius: 10px;">
-                    <h2 style="color: #4a90e2;">New Contact Form Submission</h2>
-                    <div style="background: #f9f9f9; padding: 20px; border-radius: 5px; margin: 20px 0;">
-                        <p><strong>From:</strong> {name}</p>
-                        <p><strong>Email:</strong> <a href="mailto:{email}">{email}</a></p>
-                        <p><strong>Subject:</strong> {subject}</p>
-                    </div>
-                    <div style="background: white; padding: 20px; border-left: 4px solid #4a90e2;">
-                        <h3>Message:</h3>
-                        <p style="white-space: pre-wrap;">{message}</p>
-                    </div>
-                    <hr style="margin: 30px 0; border: none; border-top: 1px solid #ddd;">
-                    <p style="color: #888; font-size: 14px;">
-                        Reply directly to: <a href="mailto:{email}">{email}</a>
-                    </p>
-                </div>
-            </body>
-            </html>
-            """
+            # Plain-text and HTML bodies (the HTML one is autoescaped)
+            msg.body, msg.html = email_templates.render(
+                'contact', name=name, email=email, subject=subject, message=message
+            )
             
             # Send email
             mail.send(msg)
-            print(f"✅ Email sent successfully!")
+            log.info("Contact form email sent", extra={'visitor_email': email})
             
             return redirect(url_for('sent'))
             
         except Exception as e:
-            print(f"❌ ERROR: {str(e)}")
-            print(f"❌ Error Type: {type(e).__name__}")
-            
-            import traceback
-            print(f"❌ Full Traceback:\n{traceback.format_exc()}")
+            contact_guard.release_submission(submission)
+            log.exception("Contact form email failed", extra={'error_type': type(e).__name__})
             
             # Debug info
-            if not os.getenv('GMAIL_USER'):
-                print("❌ GMAIL_USER not set in .env!")
-            if not os.getenv('GMAIL_APP_PASSWORD'):
-                print("❌ GMAIL_APP_PASSWORD not set in .env!")
+            if not settings.current.gmail_user:
+                log.error("GMAIL_USER not set in .env!")
+            if not settings.current.gmail_app_password:
+                log.error("GMAIL_APP_PASSWORD not set in .env!")
             
             return redirect(url_for('fail'))
     
-    return render_template('feedback.html')
+    return render_template('feedback.html', limits=feedback_form.fields)
 
 @app.route('/sent')
 def sent():
@@ -143,41 +271,39 @@ def fail():
 
 @app.route('/test-email')
 def test_email():
-    """Test your Gmail configuration"""
-    try:
-        msg = Message(
-            subject="Test Email - Portfolio Website",
-            sender=app.config['MAIL_DEFAULT_SENDER'],
-            recipients=[os.getenv('GMAIL_USER')]
-        )
-        msg.body = "This is a test email. If you receive this, your Gmail SMTP is configured correctly!"
-        
-        mail.send(msg)
-        return {
-            "status": "success", 
-            "message": "Test email sent! Check your inbox."
-        }, 200
-        
-    except Exception as e:
-        import traceback
+    """Test your Gmail configuration (connect, STARTTLS and login; nothing is sent)"""
+    if not settings.current.gmail_configured:
         return {
             "status": "error",
-            "message": str(e),
-            "traceback": traceback.format_exc()
-        }, 500
+            "message": "GMAIL_USER and GMAIL_APP_PASSWORD are not set."
+        }, 503
+    
+    result = smtp_diagnostics.status()
+    if result is None:
+        return {
+            "status": "pending",
+            "message": "SMTP check started; try again in a few seconds."
+        }, 202
+    
+    return {
+        "status": "success" if result['ok'] else "error",
+        "message": "SMTP login succeeded." if result['ok'] else result['error'],
+        "timings_ms": result['timings_ms'],
+        "total_ms": result['total_ms'],
+        "age_s": round(time.time() - result['checked_at'], 1),
+        "refreshing": smtp_diagnostics.running
+    }, 200 if result['ok'] else 503
 
 @app.route('/health')
 def health():
     """Check if email is configured"""
-    gmail_user = os.getenv('GMAIL_USER')
-    gmail_pass = os.getenv('GMAIL_APP_PASSWORD')
+    current = settings.current
     
     return {
         'status': 'healthy',
-        'gmail_configured': bool(gmail_user and gmail_pass),
-        'gmail_user': gmail_user if gmail_user else 'NOT SET',
-        'mail_server': app.config['MAIL_SERVER'],
-        'mail_port': app.config['MAIL_PORT']
+        'gmail_configured': current.gmail_configured,
+        'mail_server': current.mail_server,
+        'mail_port': current.mail_port
     }, 200
 
 if __name__ == '__main__':
@@ -0,0 +1,170 @@
+"""Mail throughput benchmark against the local SMTP sink.
+
+    python -m bench.mail                          # flask_mail, one connection per message
+    python -m bench.mail --reuse                  # one connection per client thread
+    python -m bench.mail --starttls --auth --latency 0.005 --failure-rate 0.01
+
+Reports messages per second, p50/p95/p99 send latency, failures and how
+many messages went over each SMTP connection. ``--backend flask_email``
+drives the vendored flask_email SMTP backend when it can be imported.
+"""
+import argparse
+import sys
+import threading
+import time
+
+from flask import Flask
+
+from bench.run import summarize
+from bench.smtp_sink import SMTPSink
+
+USERNAME = 'bench@example.com'
+PASSWORD = 'bench-password'
+
+
+def flask_mail_sender(sink, args):
+    from flask_mail import Mail, Message
+
+    app = Flask(__name__)
+    app.config.update(
+        MAIL_SERVER='127.0.0.1',
+        MAIL_PORT=sink.port,
+        MAIL_USE_TLS=args.starttls,
+        MAIL_USE_SSL=False,
+        MAIL_USERNAME=USERNAME if args.auth else None,
+        MAIL_PASSWORD=PASSWORD if args.auth else None,
+        MAIL_DEFAULT_SENDER=USERNAME,
+    )
+    mail = Mail(app)
+
+    def make_message(i):
+        return Message(subject=f'Benchmark {i}', recipients=[USERNAME], body='x' * args.size)
+
+    def run(count, record):
+        with app.app_context():
+            if not args.reuse:
+                for i in range(count):
+                    record(lambda: mail.send(make_message(i)))
+                return
+            with mail.connect() as connection:
+                for i in range(count):
+                    record(lambda: connection.send(make_message(i)))
+
+    return run
+
+
+def flask_email_sender(sink, args):
+    from flask_email import EmailMessage
+    from flask_email.backends.smtp import Mail
+
+    app = Flask(__name__)
+    app.config.update(
+        EMAIL_HOST='127.0.0.1',
+        EMAIL_PORT=sink.port,
+        EMAIL_USE_TLS=args.starttls,
+        EMAIL_HOST_USER=USERNAME if args.auth else None,
+        EMAIL_HOST_PASSWORD=PASSWORD if args.auth else None,
+    )
+
+    def run(count, record):
+        with app.app_context():
+            backend = Mail(app)
+            if args.reuse:
+                backend.open()
+            try:
+                for i in range(count):
+                    message = EmailMessage(f'Benchmark {i}', 'x' * args.size, USERNAME, [USERNAME])
+                    record(lambda: backend.send_messages([message]))
+            finally:
+                if args.reuse:
+                    backend.close()
+
+    return run
+
+
+BACKENDS = {
+    'flask_mail': flask_mail_sender,
+    'flask_email': flask_email_sender,
+}
+
+
+def bench_backend(name, args):
+    sink = SMTPSink(
+        starttls=args.starttls,
+        credentials={USERNAME: PASSWORD} if args.auth else None,
+        latency=args.latency,
+        failure_rate=args.failure_rate,
+        seed=0,
+    )
+    with sink:
+        try:
+            run = BACKENDS[name](sink, args)
+        except (ImportError, SyntaxError) as e:
+            print(f"{name}: skipped, backend could not be imported ({type(e).__name__}: {e})")
+            return None
+
+        latencies = []
+        failures = []
+        lock = threading.Lock()
+
+        def client(count):
+            local, errors = [], 0
+
+            def record(send):
+                nonlocal errors
+                start = time.perf_counter()
+                try:
+                    send()
+                except Exception:
+                    errors += 1
+                local.append(time.perf_counter() - start)
+
+            run(count, record)
+            with lock:
+                latencies.extend(local)
+                failures.append(errors)
+
+        per_client = max(1, args.messages // args.concurrency)
+        threads = [threading.Thread(target=client, args=(per_client,)) for _ in range(args.concurrency)]
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+
+    result = summarize(latencies, elapsed)
+    result['failures'] = sum(failures)
+    result['connections'] = sink.stats['connections']
+    result['messages_per_connection'] = round(
+        sink.stats['messages'] / sink.stats['connections'], 1) if sink.stats['connections'] else 0.0
+    result['sink'] = dict(sink.stats)
+    mode = 'reuse' if args.reuse else 'per-message'
+    print(f"{name} ({mode}, c={args.concurrency}): {result['rps']} msg/s, "
+          f"p50 {result['p50_ms']} ms, p95 {result['p95_ms']} ms, p99 {result['p99_ms']} ms, "
+          f"{result['failures']} failed, {result['connections']} connections "
+          f"({result['messages_per_connection']} msg/conn)")
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--backend', choices=[*BACKENDS, 'all'], default='flask_mail')
+    parser.add_argument('-n', '--messages', type=int, default=200)
+    parser.add_argument('-c', '--concurrency', type=int, default=4)
+    parser.add_argument('--reuse', action='store_true', help='keep one SMTP connection per client')
+    parser.add_argument('--size', type=int, default=1024, help='body size in bytes')
+    parser.add_argument('--starttls', action='store_true')
+    parser.add_argument('--auth', action='store_true')
+    parser.add_argument('--latency', type=float, default=0.0, help='sink delay per reply (s)')
+    parser.add_argument('--failure-rate', type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    names = list(BACKENDS) if args.backend == 'all' else [args.backend]
+    for name in names:
+        bench_backend(name, args)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
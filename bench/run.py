@@ -0,0 +1,310 @@
+"""Latency and throughput benchmark for every route in app.py.
+
+    python -m bench.run                    # in-process WSGI
+    python -m bench.run --gunicorn         # ... and through a local gunicorn
+    python -m bench.run --save-baseline    # store results as the new baseline
+
+Mail goes to a local SMTP sink, never to Gmail. Results are compared with
+bench/baseline.json when it exists; the exit status is 1 if a route's p95
+latency or throughput moved past ``--tolerance``.
+"""
+import argparse
+import itertools
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from http.client import HTTPConnection
+from urllib.parse import urlencode
+
+from bench.smtp_sink import SMTPSink
+
+# Accepted by the sink's AUTH, so /test-email reports a successful login.
+SMTP_USER = 'portfolio@example.com'
+SMTP_PASSWORD = 'bench-password'
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_ROOT = os.path.dirname(BENCH_DIR)
+BASELINE_PATH = os.path.join(BENCH_DIR, 'baseline.json')
+
+FEEDBACK_FORM = {
+    'name': 'Bench Mark',
+    'email': 'bench@example.com',
+    'subject': 'Benchmark',
+    'message': 'Hello from the benchmark suite.',
+}
+_feedback_numbers = itertools.count()
+
+
+def feedback_form():
+    """A new message each call, so the contact guard's dedup never short-circuits the send."""
+    n = next(_feedback_numbers)
+    return {**FEEDBACK_FORM, 'subject': f"Benchmark #{n}", 'message': f"{FEEDBACK_FORM['message']} ({n})"}
+
+
+def form_data(data):
+    return data() if callable(data) else data
+
+
+# (name, method, path, form data or a callable returning it)
+ROUTES = [
+    ('index', 'GET', '/', None),
+    ('home', 'GET', '/home', None),
+    ('about', 'GET', '/about', None),
+    ('certificates', 'GET', '/certificates', None),
+    ('certificates_skill', 'GET', '/certificates?skill=python', None),
+    ('testimonials', 'GET', '/testimonials', None),
+    ('feedback_get', 'GET', '/feedback', None),
+    ('feedback_post', 'POST', '/feedback', feedback_form),
+    ('sent', 'GET', '/sent', None),
+    ('fail', 'GET', '/fail', None),
+    ('health', 'GET', '/health', None),
+    ('healthz', 'GET', '/healthz', None),
+    ('readyz', 'GET', '/readyz', None),
+    ('test_email', 'GET', '/test-email', None),
+    ('static_css', 'GET', '/static/home.css', None),
+    ('static_image', 'GET', '/static/sbani_po.jpeg', None),
+]
+
+
+def bench_env(smtp_port, max_posts):
+    """Environment that points app.py's mail settings at the sink.
+
+    The contact guard's rate limits are raised to ``max_posts``: every
+    benchmark request comes from the same client and address.
+    """
+    env = dict(os.environ)
+    env.update({
+        'GMAIL_USER': SMTP_USER,
+        'GMAIL_APP_PASSWORD': SMTP_PASSWORD,
+        'MAIL_SERVER': '127.0.0.1',
+        'MAIL_PORT': str(smtp_port),
+        'MAIL_USE_TLS': 'false',
+        'CONTACT_GUARD_CLIENT_LIMIT': str(max_posts),
+        'CONTACT_GUARD_EMAIL_LIMIT': str(max_posts),
+    })
+    return env
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies, elapsed):
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+def rss_mb(pids):
+    total_kb = 0
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total_kb += int(line.split()[1])
+        except OSError:
+            continue
+    return round(total_kb / 1024, 1)
+
+
+def child_pids(parent):
+    children = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == parent:
+            children.append(int(entry))
+    return children
+
+
+# IN-PROCESS
+def run_in_process(requests, warmup):
+    from werkzeug.test import EnvironBuilder
+
+    import app as portfolio
+
+    wsgi = portfolio.app.wsgi_app
+
+    def start_response(status, headers, exc_info=None):
+        return None
+
+    def call(method, path, data):
+        builder = EnvironBuilder(path=path, method=method, data=form_data(data))
+        environ = builder.get_environ()
+        builder.close()
+        start = time.perf_counter()
+        body = wsgi(environ, start_response)
+        try:
+            for _chunk in body:
+                pass
+        finally:
+            if hasattr(body, 'close'):
+                body.close()
+        return time.perf_counter() - start
+
+    results = {}
+    for name, method, path, data in ROUTES:
+        for _ in range(warmup):
+            call(method, path, data)
+        latencies = [call(method, path, data) for _ in range(requests)]
+        results[name] = summarize(latencies, sum(latencies))
+    return results, rss_mb([os.getpid()])
+
+
+# GUNICORN
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _wait_for_port(port, timeout=15):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f'gunicorn did not start listening on port {port}')
+
+
+def run_gunicorn(requests, warmup, concurrency, env):
+    port = _free_port()
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{port}'],
+        cwd=APP_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        _wait_for_port(port)
+        results = {}
+        for name, method, path, data in ROUTES:
+            headers = {'Content-Type': 'application/x-www-form-urlencoded'} if data else {}
+            per_worker = max(1, requests // concurrency)
+            latencies = []
+            lock = threading.Lock()
+
+            def worker(count):
+                conn = HTTPConnection('127.0.0.1', port, timeout=30)
+                local = []
+                for _ in range(count):
+                    body = urlencode(form_data(data)) if data else None
+                    start = time.perf_counter()
+                    conn.request(method, path, body=body, headers=headers)
+                    conn.getresponse().read()
+                    local.append(time.perf_counter() - start)
+                conn.close()
+                with lock:
+                    latencies.extend(local)
+
+            worker(warmup)
+            latencies.clear()
+            threads = [threading.Thread(target=worker, args=(per_worker,)) for _ in range(concurrency)]
+            started = time.perf_counter()
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            results[name] = summarize(latencies, time.perf_counter() - started)
+        return results, rss_mb([proc.pid] + child_pids(proc.pid))
+    finally:
+        proc.terminate()
+        proc.wait(timeout=15)
+
+
+# REPORTING
+def print_results(mode, results, rss):
+    print(f"\n{mode}  (RSS {rss} MB)")
+    print(f"  {'route':<20} {'req/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, r in results.items():
+        print(f"  {name:<20} {r['rps']:>10} {r['p50_ms']:>9} {r['p95_ms']:>9} {r['p99_ms']:>9}")
+
+
+def compare(report, baseline, tolerance):
+    """Return a line for every route that got slower or less throughput than the baseline."""
+    regressions = []
+    for mode, current in report.items():
+        previous = baseline.get(mode)
+        if not previous:
+            continue
+        for name, r in current['routes'].items():
+            base = previous['routes'].get(name)
+            if base is None:
+                continue
+            if r['p95_ms'] > base['p95_ms'] * (1 + tolerance):
+                regressions.append(f"{mode}/{name}: p95 {base['p95_ms']} -> {r['p95_ms']} ms")
+            if r['rps'] < base['rps'] * (1 - tolerance):
+                regressions.append(f"{mode}/{name}: {base['rps']} -> {r['rps']} req/s")
+        if current['rss_mb'] > previous['rss_mb'] * (1 + tolerance):
+            regressions.append(f"{mode}: RSS {previous['rss_mb']} -> {current['rss_mb']} MB")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', '--requests', type=int, default=200, help='requests per route')
+    parser.add_argument('--warmup', type=int, default=20, help='untimed requests per route')
+    parser.add_argument('-c', '--concurrency', type=int, default=4, help='client threads (gunicorn)')
+    parser.add_argument('--gunicorn', action='store_true', help='also benchmark through gunicorn')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative change')
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args(argv)
+
+    report = {}
+    with SMTPSink(credentials={SMTP_USER: SMTP_PASSWORD}) as sink:
+        env = bench_env(sink.port, args.requests + args.warmup + args.concurrency)
+        os.environ.update(env)
+        results, rss = run_in_process(args.requests, args.warmup)
+        report['in_process'] = {'routes': results, 'rss_mb': rss}
+        print_results('in-process', results, rss)
+
+        if args.gunicorn:
+            results, rss = run_gunicorn(args.requests, args.warmup, args.concurrency, env)
+            report['gunicorn'] = {'routes': results, 'rss_mb': rss}
+            print_results(f'gunicorn (c={args.concurrency})', results, rss)
+        print(f"\nSMTP sink received {sink.messages} messages")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline yet; run with --save-baseline to create one.")
+        return 0
+    with open(args.baseline) as f:
+        regressions = compare(report, json.load(f), args.tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if not regressions:
+        print("No regressions against the baseline.")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
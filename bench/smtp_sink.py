@@ -0,0 +1,246 @@
+"""A local SMTP server that accepts and discards mail, for benchmarks.
+
+Besides plain SMTP it can emulate the parts of a real provider that cost
+time: STARTTLS (with a throwaway self-signed certificate), AUTH PLAIN and
+LOGIN, PIPELINING, a fixed delay before every reply and a rate of
+temporary failures on DATA.
+"""
+import base64
+import os
+import random
+import socketserver
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+
+
+def make_self_signed_cert(directory):
+    """Create ``cert.pem``/``key.pem`` for ``localhost`` in ``directory`` with openssl."""
+    certfile = os.path.join(directory, 'cert.pem')
+    keyfile = os.path.join(directory, 'key.pem')
+    subprocess.run(
+        ['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+         '-subj', '/CN=localhost', '-keyout', keyfile, '-out', certfile],
+        check=True, capture_output=True,
+    )
+    return certfile, keyfile
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+
+    disable_nagle_algorithm = True
+
+    def reply(self, *lines):
+        sink = self.server
+        if sink.latency:
+            time.sleep(sink.latency)
+        self.wfile.write(''.join(f'{line}\r\n' for line in lines).encode())
+
+    def readline(self):
+        line = self.rfile.readline()
+        return line.decode('utf-8', 'replace').strip() if line else None
+
+    def handle(self):
+        sink = self.server
+        sink.record('connections')
+        self.tls = False
+        self.authenticated = False
+        self.reply(f'220 {sink.hostname} ESMTP sink')
+        while True:
+            command = self.readline()
+            if command is None:
+                return
+            verb, _, arg = command.partition(' ')
+            verb = verb.upper()
+            if verb == 'EHLO':
+                self.reply(*self.ehlo_lines())
+            elif verb == 'HELO':
+                self.reply(f'250 {sink.hostname}')
+            elif verb == 'STARTTLS' and sink.ssl_context is not None and not self.tls:
+                self.reply('220 Ready to start TLS')
+                self.start_tls()
+            elif verb == 'AUTH' and sink.credentials is not None:
+                self.auth(arg)
+            elif verb in ('MAIL', 'RCPT') and sink.credentials is not None and not self.authenticated:
+                self.reply('530 5.7.0 Authentication required')
+            elif verb in ('MAIL', 'RCPT', 'RSET', 'NOOP'):
+                self.reply('250 OK')
+            elif verb == 'DATA':
+                self.data()
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+    def ehlo_lines(self):
+        sink = self.server
+        extensions = ['8BITMIME']
+        if sink.pipelining:
+            extensions.append('PIPELINING')
+        if sink.ssl_context is not None and not self.tls:
+            extensions.append('STARTTLS')
+        if sink.credentials is not None:
+            extensions.append('AUTH PLAIN LOGIN')
+        lines = [f'250-{sink.hostname}']
+        lines += [f'250-{ext}' for ext in extensions[:-1]]
+        lines.append(f'250 {extensions[-1]}')
+        return lines
+
+    def start_tls(self):
+        self.connection = self.server.ssl_context.wrap_socket(self.connection, server_side=True)
+        self.rfile = self.connection.makefile('rb')
+        self.wfile = self.connection.makefile('wb', buffering=0)
+        self.tls = True
+        self.server.record('tls_upgrades')
+
+    def auth(self, arg):
+        mechanism, _, initial = arg.partition(' ')
+        mechanism = mechanism.upper()
+        if mechanism == 'PLAIN':
+            if not initial:
+                self.reply('334 ')
+                initial = self.readline() or ''
+            try:
+                _, username, password = base64.b64decode(initial).decode().split('\0')
+            except ValueError:
+                self.reply('501 5.5.2 Malformed AUTH PLAIN')
+                return
+        elif mechanism == 'LOGIN':
+            if not initial:
+                self.reply('334 VXNlcm5hbWU6')
+                initial = self.readline() or ''
+            self.reply('334 UGFzc3dvcmQ6')
+            try:
+                username = base64.b64decode(initial).decode()
+                password = base64.b64decode(self.readline() or '').decode()
+            except ValueError:
+                self.reply('501 5.5.2 Malformed AUTH LOGIN')
+                return
+        else:
+            self.reply('504 5.5.4 Unrecognized authentication type')
+            return
+        if self.server.check_credentials(username, password):
+            self.authenticated = True
+            self.server.record('auth_ok')
+            self.reply('235 2.7.0 Authentication successful')
+        else:
+            self.server.record('auth_failed')
+            self.reply('535 5.7.8 Authentication credentials invalid')
+
+    def data(self):
+        sink = self.server
+        self.reply('354 End data with <CR><LF>.<CR><LF>')
+        size = 0
+        for line in self.rfile:
+            if line in (b'.\r\n', b'.\n'):
+                break
+            size += len(line)
+        if sink.should_fail():
+            sink.record('rejected')
+            self.reply('451 4.3.0 Temporary failure, try again later')
+            return
+        sink.record('messages', size)
+        self.reply('250 OK queued')
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    """Threaded SMTP server on ``127.0.0.1``; ``port=0`` picks a free port.
+
+    :param starttls: offer STARTTLS. Without ``certfile``/``keyfile`` a
+        self-signed certificate is generated with the openssl CLI.
+    :param credentials: ``{username: password}`` required via AUTH, or
+        ``None`` to accept mail without authentication.
+    :param latency: seconds to wait before every reply.
+    :param failure_rate: fraction of messages answered with a 451.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+    hostname = 'localhost'
+
+    def __init__(self, host='127.0.0.1', port=0, handler=SMTPHandler, starttls=False,
+                 certfile=None, keyfile=None, credentials=None, pipelining=True,
+                 latency=0.0, failure_rate=0.0, seed=None):
+        super().__init__((host, port), handler)
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._tempdir = None
+        self.credentials = credentials
+        self.pipelining = pipelining
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.ssl_context = None
+        if starttls:
+            if certfile is None:
+                self._tempdir = tempfile.TemporaryDirectory()
+                certfile, keyfile = make_self_signed_cert(self._tempdir.name)
+            self.ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            self.ssl_context.load_cert_chain(certfile, keyfile)
+        self.stats = dict.fromkeys(
+            ('connections', 'tls_upgrades', 'auth_ok', 'auth_failed', 'messages', 'rejected', 'bytes'), 0)
+        self._thread = None
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    @property
+    def messages(self):
+        return self.stats['messages']
+
+    def record(self, counter, size=0):
+        with self._lock:
+            self.stats[counter] += 1
+            self.stats['bytes'] += size
+
+    def check_credentials(self, username, password):
+        return self.credentials.get(username) == password
+
+    def should_fail(self):
+        if not self.failure_rate:
+            return False
+        with self._lock:
+            return self._random.random() < self.failure_rate
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._tempdir is not None:
+            self._tempdir.cleanup()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Run a local SMTP sink.')
+    parser.add_argument('--port', type=int, default=8025)
+    parser.add_argument('--starttls', action='store_true')
+    parser.add_argument('--user', help='require AUTH as user:password')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds before each reply')
+    parser.add_argument('--failure-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    credentials = dict([args.user.split(':', 1)]) if args.user else None
+    sink = SMTPSink(port=args.port, starttls=args.starttls, credentials=credentials,
+                    latency=args.latency, failure_rate=args.failure_rate)
+    print(f"SMTP sink listening on 127.0.0.1:{sink.port}")
+    try:
+        sink.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(sink.stats)
@@ -0,0 +1,78 @@
+import os
+
+APP_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+# (directory, filename) -> path found searching upward from directory, or None
+_search_cache = {}
+
+
+def find_env_file(filename='.env', start=APP_ROOT):
+    """Find ``filename`` in ``start`` or the nearest parent directory that has it.
+
+    Same search as ``dotenv.find_dotenv()``, without the stack-frame
+    inspection. Every directory visited is remembered with the outcome,
+    misses included, so later searches from it or from any directory below
+    it stop there instead of walking to ``/`` again. Call
+    ``clear_env_file_cache()`` after creating or removing a file.
+    """
+    start = os.path.abspath(start)
+    result = _search_cache.get((start, filename), False)
+    if result is not False:
+        return result
+
+    visited = []
+    directory = start
+    while True:
+        result = _search_cache.get((directory, filename), False)
+        if result is not False:
+            break
+        visited.append(directory)
+        candidate = os.path.join(directory, filename)
+        if os.path.isfile(candidate):
+            result = candidate
+            break
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            result = None
+            break
+        directory = parent
+
+    for directory in visited:
+        _search_cache[(directory, filename)] = result
+    return result
+
+
+def clear_env_file_cache():
+    _search_cache.clear()
+
+
+def dotenv_path(filename='.env'):
+    """The ``.env`` app.py loads: ``DOTENV_PATH`` if set, else the nearest one above the app."""
+    override = os.environ.get('DOTENV_PATH')
+    if override:
+        return override if os.path.isfile(override) else None
+    return find_env_file(filename)
+
+
+def load_env():
+    """Load ``.env`` into ``os.environ``; python-dotenv is only imported if a file exists.
+
+    Parsing goes through ``envfile``, which caches the result per file
+    version, so calling this again for an unchanged file costs a ``stat``.
+    """
+    path = dotenv_path()
+    if path is None:
+        return False
+    from envfile import load_dotenv
+    return load_dotenv(path)
+
+
+def parse_flag(value, default=False):
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def env_flag(name, default=False):
+    return parse_flag(os.getenv(name), default)
@@ -0,0 +1,307 @@
+import hashlib
+import math
+import re
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+from werkzeug.exceptions import TooManyRequests
+
+from sqlite_store import SQLiteStore
+
+EMAIL_RE = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+LINK_RE = re.compile(r'https?://|www\.', re.IGNORECASE)
+
+
+class _Ring:
+    __slots__ = ('times', 'pos')
+
+    def __init__(self, limit):
+        self.times = array('d', [-math.inf]) * limit
+        self.pos = 0
+
+
+class SlidingWindowLimiter:
+    """In-process sliding-window limiter: at most ``limit`` hits per ``window`` seconds.
+
+    Each key owns a ring buffer of its last ``limit`` hit times; a hit is
+    allowed when the slot it would overwrite (the oldest) is outside the
+    window. At most ``max_keys`` keys are tracked; stale ones are pruned
+    first, then the oldest-inserted.
+    """
+
+    def __init__(self, limit, window, max_keys=10000):
+        if limit < 0:
+            raise ValueError(f"limit must be 0 (refuse every hit) or more, not {limit}")
+        self.limit = limit
+        self.window = window
+        self.max_keys = max_keys
+        self._rings = {}
+        self._lock = threading.Lock()
+
+    def hit(self, key):
+        """Record a hit; return 0 if allowed, otherwise seconds until it would be."""
+        if not self.limit:
+            return float(self.window)
+        now = time.monotonic()
+        with self._lock:
+            ring = self._rings.get(key)
+            if ring is None:
+                if len(self._rings) >= self.max_keys:
+                    self._prune(now)
+                ring = self._rings[key] = _Ring(self.limit)
+            age = now - ring.times[ring.pos]
+            if age < self.window:
+                return self.window - age
+            ring.times[ring.pos] = now
+            ring.pos = (ring.pos + 1) % self.limit
+            return 0.0
+
+    def _prune(self, now):
+        stale = [key for key, ring in self._rings.items()
+                 if now - ring.times[ring.pos - 1] >= self.window]
+        for key in stale:
+            del self._rings[key]
+        if len(self._rings) >= self.max_keys:
+            del self._rings[next(iter(self._rings))]
+
+
+class SQLiteWindowLimiter(SQLiteStore):
+    """Sliding-window limiter shared by every worker through a SQLite file."""
+
+    def __init__(self, path, limit, window, table='contact_hits'):
+        super().__init__(path, table)
+        self.limit = limit
+        self.window = window
+
+    def _schema(self, conn):
+        conn.execute(f'CREATE TABLE IF NOT EXISTS {self.table} (key TEXT NOT NULL, ts REAL NOT NULL)')
+        conn.execute(f'CREATE INDEX IF NOT EXISTS {self.table}_key_ts ON {self.table} (key, ts)')
+
+    def hit(self, key):
+        now = time.time()
+        with self._transaction() as conn:
+            rows = conn.execute(
+                f'SELECT ts FROM {self.table} WHERE key = ? AND ts > ? ORDER BY ts LIMIT ?',
+                (key, now - self.window, self.limit)
+            ).fetchall()
+            if len(rows) >= self.limit:
+                return self.window - (now - rows[0][0])
+            conn.execute(f'INSERT INTO {self.table} (key, ts) VALUES (?, ?)', (key, now))
+            if self._should_prune():
+                conn.execute(f'DELETE FROM {self.table} WHERE ts <= ?', (now - self.window,))
+            return 0.0
+
+
+class TieredLimiter:
+    """Check the in-process ring first; only hits it lets through reach SQLite."""
+
+    def __init__(self, *tiers):
+        self.tiers = tiers
+
+    def hit(self, key):
+        for tier in self.tiers:
+            retry_after = tier.hit(key)
+            if retry_after:
+                return retry_after
+        return 0.0
+
+
+class SubmissionCache:
+    """LRU of recently seen submission keys, each forgotten ``ttl`` seconds after it was claimed."""
+
+    def __init__(self, ttl, maxsize=4096):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._expires = OrderedDict()
+        self._lock = threading.Lock()
+
+    def claim(self, key):
+        """Return ``True`` if ``key`` was not seen within the TTL (and remember it now)."""
+        now = time.monotonic()
+        with self._lock:
+            expires = self._expires.get(key)
+            if expires is not None and expires > now:
+                self._expires.move_to_end(key)
+                return False
+            self._expires[key] = now + self.ttl
+            self._expires.move_to_end(key)
+            while len(self._expires) > self.maxsize:
+                self._expires.popitem(last=False)
+            return True
+
+    def release(self, key):
+        with self._lock:
+            self._expires.pop(key, None)
+
+
+class SQLiteSubmissionCache(SQLiteStore):
+    """``SubmissionCache`` shared by every worker through a SQLite file."""
+
+    def __init__(self, path, ttl, table='contact_seen'):
+        super().__init__(path, table)
+        self.ttl = ttl
+
+    def _schema(self, conn):
+        conn.execute(f'CREATE TABLE IF NOT EXISTS {self.table} (key TEXT PRIMARY KEY, expires REAL NOT NULL)')
+
+    def claim(self, key):
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(f'DELETE FROM {self.table} WHERE key = ? AND expires <= ?', (key, now))
+            claimed = conn.execute(
+                f'INSERT OR IGNORE INTO {self.table} (key, expires) VALUES (?, ?)', (key, now + self.ttl)
+            ).rowcount == 1
+            if claimed and self._should_prune():
+                conn.execute(f'DELETE FROM {self.table} WHERE expires <= ?', (now,))
+            return claimed
+
+    def release(self, key):
+        with self._transaction() as conn:
+            conn.execute(f'DELETE FROM {self.table} WHERE key = ?', (key,))
+
+
+class TieredSubmissionCache:
+    """Ask the in-process cache first; only keys it has not seen reach SQLite."""
+
+    def __init__(self, *tiers):
+        self.tiers = tiers
+
+    def claim(self, key):
+        return all(tier.claim(key) for tier in self.tiers)
+
+    def release(self, key):
+        for tier in self.tiers:
+            tier.release(key)
+
+
+def normalize_form(form):
+    """Strip every value and lowercase the email; the guard's checks expect a form passed through this."""
+    form = {name: value.strip() for name, value in form.items()}
+    if 'email' in form:
+        form['email'] = form['email'].lower()
+    return form
+
+
+def submission_key(form):
+    """Hash of the (email, subject, message) of a normalized contact form."""
+    parts = (form.get('email', ''), form.get('subject', ''), form.get('message', ''))
+    return hashlib.blake2b('\0'.join(parts).encode(), digest_size=16).hexdigest()
+
+
+def spam_reason(form, trap_field='website', max_links=3):
+    """Cheap content checks; return why ``form`` looks automated, or ``None``."""
+    if form.get(trap_field):
+        return 'honeypot'
+    if not EMAIL_RE.match(form.get('email', '')):
+        return 'email'
+    name = form.get('name', '')
+    subject = form.get('subject', '')
+    if '\n' in name or '\r' in name or '\n' in subject or '\r' in subject:
+        return 'header'
+    if LINK_RE.search(name) or LINK_RE.search(subject):
+        return 'link-in-header'
+    if len(LINK_RE.findall(form.get('message', ''))) > max_links:
+        return 'links'
+    return None
+
+
+class ContactGuard:
+    """Rate limits and spam heuristics for the contact form.
+
+    ``check_client`` runs before the body is read and limits submissions
+    per client address. ``check_form`` then applies ``spam_reason``, and
+    ``claim_submission`` limits submissions per sender email. Both limits
+    keep an in-process ring buffer; with ``CONTACT_GUARD_DB`` set, hits
+    are also shared between workers through SQLite. Rate-limited requests
+    raise ``TooManyRequests`` (429) with ``Retry-After``.
+
+    ``claim_submission`` recognises a repeat of the same (email, subject,
+    message) within ``CONTACT_DEDUP_TTL`` seconds, in-process and, with
+    ``CONTACT_GUARD_DB``, across workers. A repeat does not count against
+    the sender's limit.
+
+    ``check_form`` and ``claim_submission`` expect a form passed through
+    ``normalize_form``. The client key is whatever address the caller
+    passes: behind a reverse proxy that is the proxy's unless the app
+    trusts its ``X-Forwarded-For`` (``TRUSTED_PROXIES`` in app.py). A limit
+    of 0 refuses every submission.
+    """
+
+    def __init__(self, app=None):
+        self.client_limiter = None
+        self.email_limiter = None
+        self.submissions = None
+        self.rejected = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('CONTACT_GUARD_CLIENT_LIMIT', 5)
+        app.config.setdefault('CONTACT_GUARD_EMAIL_LIMIT', 3)
+        app.config.setdefault('CONTACT_GUARD_WINDOW', 3600)
+        app.config.setdefault('CONTACT_GUARD_DB', None)
+        app.config.setdefault('CONTACT_GUARD_MAX_LINKS', 3)
+        app.config.setdefault('CONTACT_DEDUP_TTL', 600)
+        app.config.setdefault('CONTACT_DEDUP_SIZE', 4096)
+        app.extensions['contact_guard'] = self
+        self.max_links = app.config['CONTACT_GUARD_MAX_LINKS']
+        self.client_limiter = self._limiter(app, 'CONTACT_GUARD_CLIENT_LIMIT', 'contact_client_hits')
+        self.email_limiter = self._limiter(app, 'CONTACT_GUARD_EMAIL_LIMIT', 'contact_email_hits')
+        self.submissions = SubmissionCache(app.config['CONTACT_DEDUP_TTL'], app.config['CONTACT_DEDUP_SIZE'])
+        if app.config['CONTACT_GUARD_DB']:
+            self.submissions = TieredSubmissionCache(
+                self.submissions, SQLiteSubmissionCache(app.config['CONTACT_GUARD_DB'], app.config['CONTACT_DEDUP_TTL'])
+            )
+
+    @staticmethod
+    def _limiter(app, limit_key, table):
+        limit = app.config[limit_key]
+        window = app.config['CONTACT_GUARD_WINDOW']
+        if limit < 0:
+            raise ValueError(f"{limit_key} must be 0 (refuse every submission) or more, not {limit}")
+        local = SlidingWindowLimiter(limit, window)
+        if not app.config['CONTACT_GUARD_DB'] or not limit:
+            return local
+        return TieredLimiter(local, SQLiteWindowLimiter(app.config['CONTACT_GUARD_DB'], limit, window, table))
+
+    def _reject(self, reason):
+        self.rejected[reason] = self.rejected.get(reason, 0) + 1
+
+    def _limit(self, limiter, key, reason):
+        retry_after = limiter.hit(key)
+        if retry_after:
+            self._reject(reason)
+            raise TooManyRequests(retry_after=math.ceil(retry_after))
+
+    def check_client(self, remote_addr):
+        self._limit(self.client_limiter, remote_addr or '-', 'client-rate')
+
+    def check_form(self, form):
+        """Return the spam reason for ``form``, or ``None``."""
+        reason = spam_reason(form, max_links=self.max_links)
+        if reason is not None:
+            self._reject(reason)
+        return reason
+
+    def claim_submission(self, form):
+        """Return a key for ``form``, or ``None`` if the same form was already claimed within the TTL.
+
+        A new submission then counts against its sender's limit; over it,
+        the claim is dropped and 429 is raised. Pass the key to
+        ``release_submission`` if sending fails so the visitor can retry.
+        """
+        key = submission_key(form)
+        if not self.submissions.claim(key):
+            self._reject('duplicate')
+            return None
+        try:
+            self._limit(self.email_limiter, form['email'], 'email-rate')
+        except TooManyRequests:
+            self.submissions.release(key)
+            raise
+        return key
+
+    def release_submission(self, key):
+        self.submissions.release(key)
@@ -0,0 +1,105 @@
+import json
+import math
+import os
+from types import MappingProxyType
+from typing import NamedTuple
+
+CONTENT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'content')
+
+
+# RECORDS
+class Certificate(NamedTuple):
+    slug: str
+    title: str
+    image: str
+    alt: str
+    icon: str
+    category: str
+    tags: tuple
+    benefits: str
+    focus: str
+
+
+class Testimonial(NamedTuple):
+    name: str
+    image: str
+    alt: str
+    category: str
+    paragraphs: tuple
+
+
+class Page(NamedTuple):
+    items: tuple
+    page: int
+    pages: int
+    total: int
+
+
+def _build_index(records, key):
+    """Map every value of ``key`` to the tuple of records carrying it."""
+    index = {}
+    for record in records:
+        values = getattr(record, key)
+        if isinstance(values, str):
+            values = (values,)
+        for value in values:
+            index.setdefault(value, []).append(record)
+    return MappingProxyType({value: tuple(items) for value, items in sorted(index.items())})
+
+
+class ContentStore:
+    """Certificates and testimonials loaded once, with lookup indexes built up front."""
+
+    __slots__ = ('certificates', 'testimonials', 'certificates_by_tag',
+                 'certificates_by_category', 'testimonials_by_category')
+
+    def __init__(self, certificates, testimonials):
+        self.certificates = tuple(certificates)
+        self.testimonials = tuple(testimonials)
+        self.certificates_by_tag = _build_index(self.certificates, 'tags')
+        self.certificates_by_category = _build_index(self.certificates, 'category')
+        self.testimonials_by_category = _build_index(self.testimonials, 'category')
+
+    @property
+    def tags(self):
+        return tuple(self.certificates_by_tag)
+
+    def filter_certificates(self, skill=None, category=None):
+        """Return the certificates matching every given filter, in content order."""
+        if skill and category:
+            in_category = set(self.certificates_by_category.get(category, ()))
+            return tuple(c for c in self.certificates_by_tag.get(skill, ()) if c in in_category)
+        if skill:
+            return self.certificates_by_tag.get(skill, ())
+        if category:
+            return self.certificates_by_category.get(category, ())
+        return self.certificates
+
+    def paginate_certificates(self, skill=None, category=None, page=1, per_page=0):
+        """Slice the filtered certificates into a ``Page``; ``per_page=0`` means one page."""
+        items = self.filter_certificates(skill, category)
+        total = len(items)
+        if per_page <= 0:
+            return Page(items, 1, 1, total)
+        pages = max(1, math.ceil(total / per_page))
+        page = min(max(page, 1), pages)
+        start = (page - 1) * per_page
+        return Page(items[start:start + per_page], page, pages, total)
+
+
+def _load_json(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_content(content_dir=CONTENT_DIR):
+    """Parse ``certificates.json`` and ``testimonials.json`` into a ``ContentStore``."""
+    certificates = [
+        Certificate(**{**entry, 'tags': tuple(entry.get('tags', ()))})
+        for entry in _load_json(os.path.join(content_dir, 'certificates.json'))
+    ]
+    testimonials = [
+        Testimonial(**{**entry, 'paragraphs': tuple(entry.get('paragraphs', ()))})
+        for entry in _load_json(os.path.join(content_dir, 'testimonials.json'))
+    ]
+    return ContentStore(certificates, testimonials)
@@ -0,0 +1,51 @@
+class EmailTemplates:
+    """Notification bodies rendered from ``templates/email/<name>.txt`` and ``.html``.
+
+    Both templates of each notification are compiled on the first render
+    (or by ``load()``, which ``startup.preload`` calls before workers
+    fork) and the ``Template`` objects are kept, so a send is just a
+    render: no loader lookup, context processors or signals as with
+    ``render_template``. Flask autoescapes the ``.html`` body and leaves
+    the ``.txt`` body as is. The shared wrapper (``email/layout.html``,
+    with the inline styles) is static text in the compiled code.
+
+    With ``TEMPLATES_AUTO_RELOAD`` (on in debug) templates are looked up
+    through ``app.jinja_env`` on each render so edits show up. Nothing
+    touches ``app.jinja_env`` in ``init_app``, so extensions that have to
+    configure the environment before it is created (``TemplateProfiler``)
+    can still be set up afterwards.
+    """
+
+    folder = 'email'
+
+    def __init__(self, app=None, names=('contact',)):
+        self.names = tuple(names)
+        self._templates = None
+        self.app = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions['email_templates'] = self
+
+    def _compile(self, name):
+        env = self.app.jinja_env
+        return (env.get_template(f'{self.folder}/{name}.txt'),
+                env.get_template(f'{self.folder}/{name}.html'))
+
+    def load(self):
+        """Compile every notification's templates now instead of on the first send."""
+        if self._templates is None:
+            self._templates = {name: self._compile(name) for name in self.names}
+
+    def _get(self, name):
+        if self.app.jinja_env.auto_reload:
+            return self._compile(name)
+        self.load()
+        return self._templates[name]
+
+    def render(self, name, /, **context):
+        """Return ``(text, html)`` bodies of notification ``name``."""
+        text, html = self._get(name)
+        return text.render(context), html.render(context)
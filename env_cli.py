@@ -0,0 +1,63 @@
+import os
+
+import click
+from flask.cli import AppGroup
+
+from config import APP_ROOT, clear_env_file_cache, dotenv_path
+
+env_cli = AppGroup('env', help="Edit the .env file in a single atomic rewrite.")
+
+
+def _default_file():
+    return dotenv_path() or os.path.join(APP_ROOT, '.env')
+
+
+def _split_assignment(assignment):
+    key, sep, value = assignment.partition('=')
+    if not sep or not key:
+        raise click.BadParameter(f"expected KEY=VALUE, got {assignment!r}")
+    return key, value
+
+
+def _report(result):
+    for label, keys in zip(result._fields, result):
+        if keys:
+            click.echo(f"{label}: {', '.join(keys)}")
+
+
+_file_option = click.option('-f', '--file', type=click.Path(dir_okay=False), default=None,
+                            help="The .env file; defaults to the one app.py loads.")
+
+
+@env_cli.command('set')
+@_file_option
+@click.option('-u', '--unset', 'unset', multiple=True, metavar='KEY', help="Also remove KEY.")
+@click.option('-q', '--quote', default='always', type=click.Choice(['always', 'never', 'auto']),
+              help="How to quote values (as in the dotenv CLI).")
+@click.option('-e', '--export', is_flag=True, help="Prefix lines with 'export'.")
+@click.argument('assignments', nargs=-1, metavar='KEY=VALUE...')
+def set_command(file, unset, quote, export, assignments):
+    """Set every KEY=VALUE (and remove any --unset keys) in one pass."""
+    from envfile import update
+
+    values = dict(_split_assignment(a) for a in assignments)
+    try:
+        result = update(file or _default_file(), values, unset, quote_mode=quote, export=export)
+    except ValueError as e:
+        raise click.UsageError(str(e))
+    # The file may not have existed before.
+    clear_env_file_cache()
+    _report(result)
+
+
+@env_cli.command('unset')
+@_file_option
+@click.argument('keys', nargs=-1, required=True, metavar='KEY...')
+def unset_command(file, keys):
+    """Remove every KEY in one pass."""
+    from envfile import update
+
+    result = update(file or _default_file(), unset=keys)
+    _report(result)
+    if result.missing:
+        raise SystemExit(1)
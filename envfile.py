@@ -0,0 +1,244 @@
+"""Single-pass ``.env`` parser with a per-file cache of parsed results.
+
+``dotenv.parser`` walks the file token by token: one regex call, slice and
+line recount per key, value, comment and whitespace run. Here each
+statement is matched by a single compiled pattern whose atomic groups
+commit to the same choices dotenv's reader makes, so the ``Binding``
+tuples (keys, values, originals, line numbers, error flags) are the same.
+A statement the pattern rejects is handed to dotenv's own
+``parse_binding`` so error recovery is identical too.
+
+Parsed files are cached by (path, mtime, size, encoding); variable
+interpolation still runs on every call because it reads ``os.environ``.
+``update()`` applies many sets and unsets in one rewrite of the file.
+"""
+import io
+import logging
+import os
+import re
+import tempfile
+from collections import ChainMap
+from typing import NamedTuple
+
+from dotenv.parser import Binding, Original, Position, Reader, decode_escapes, parse_binding
+from dotenv.variables import parse_variables
+
+logger = logging.getLogger('dotenv.main')
+
+_H = r'[^\S\r\n]'
+_STATEMENT = re.compile(
+    r'(?>\s*)'
+    r'(?:(?P<eof>\Z)|'
+    rf'(?>(?:export{_H}+)?)'
+    # Key: a comment line has none; otherwise single-quoted or bare.
+    r"(?>(?=\#)|'(?P<qkey>[^']+)'|(?!')(?P<key>[^=\#\s]+))"
+    rf'(?>{_H}*)'
+    # Value, only if there is an '='; the first character picks the form.
+    rf'(?>(?P<eq>={_H}*+'
+    r"""(?>'(?P<sq>(?:\\'|[^'])*)'|"(?P<dq>(?:\\"|[^"])*)"|(?!['"])(?P<uq>[^\r\n]*))"""
+    r')?)'
+    rf'(?>(?:{_H}*\#[^\r\n]*)?)'
+    rf'{_H}*(?:\r\n|\n|\r|$))'
+)
+_SINGLE_QUOTE_ESCAPES = re.compile(r"\\[\\']")
+_DOUBLE_QUOTE_ESCAPES = re.compile(r"\\[\\'\"abfnrtv]")
+_INLINE_COMMENT = re.compile(r'\s+#.*')
+
+_cache = {}
+
+
+def _count_lines(string):
+    return string.count('\n') + string.count('\r') - string.count('\r\n')
+
+
+def _value(match):
+    if match['eq'] is None:
+        return None
+    value = match['sq']
+    if value is not None:
+        return decode_escapes(_SINGLE_QUOTE_ESCAPES, value) if '\\' in value else value
+    value = match['dq']
+    if value is not None:
+        return decode_escapes(_DOUBLE_QUOTE_ESCAPES, value) if '\\' in value else value
+    value = match['uq']
+    if '#' in value:
+        value = _INLINE_COMMENT.sub('', value)
+    return value.rstrip()
+
+
+def parse_bindings(string):
+    """Yield the ``Binding`` tuples ``dotenv.parser.parse_stream`` would for ``string``."""
+    pos = 0
+    line = 1
+    end = len(string)
+    reader = None
+    while pos < end:
+        match = _STATEMENT.match(string, pos)
+        if match is None:
+            # Let dotenv find where the statement breaks and skip the line.
+            if reader is None:
+                reader = Reader(io.StringIO(string))
+            reader.position = Position(pos, line)
+            binding = parse_binding(reader)
+            pos = reader.position.chars
+            line = reader.position.line
+            yield binding
+            continue
+        original = match[0]
+        if match['eof'] is not None:
+            binding = Binding(key=None, value=None, original=Original(original, line), error=False)
+        else:
+            key = match['qkey'] if match['qkey'] is not None else match['key']
+            binding = Binding(key=key, value=_value(match) if key is not None else None,
+                              original=Original(original, line), error=False)
+        yield binding
+        pos = match.end()
+        line += _count_lines(original)
+
+
+def read_bindings(path, encoding='utf-8'):
+    """Parsed bindings of ``path``, reused until its mtime or size changes."""
+    st = os.stat(path)
+    key = (os.path.abspath(path), st.st_mtime_ns, st.st_size, encoding)
+    bindings = _cache.get(key)
+    if bindings is None:
+        with open(path, encoding=encoding) as f:
+            bindings = tuple(parse_bindings(f.read()))
+        for binding in bindings:
+            if binding.error:
+                logger.warning("python-dotenv could not parse statement starting at line %s",
+                               binding.original.line)
+        # Drop results for older versions of the same file.
+        for stale in [k for k in _cache if k[0] == key[0]]:
+            _cache.pop(stale, None)
+        _cache[key] = bindings
+    return bindings
+
+
+def clear_cache():
+    _cache.clear()
+
+
+def resolve_variables(values, override):
+    """``dotenv.main.resolve_variables`` without copying ``os.environ`` per value."""
+    resolved = {}
+    env = ChainMap(resolved, os.environ) if override else ChainMap(os.environ, resolved)
+    for name, value in values:
+        if value is not None and '${' in value:
+            value = ''.join(atom.resolve(env) for atom in parse_variables(value))
+        resolved[name] = value
+    return resolved
+
+
+def dotenv_values(path, interpolate=True, override=True, encoding='utf-8'):
+    """Like ``dotenv.dotenv_values(path)``; a missing file gives ``{}``."""
+    if not os.path.isfile(path):
+        return {}
+    values = [(b.key, b.value) for b in read_bindings(path, encoding) if b.key is not None]
+    if interpolate:
+        return resolve_variables(values, override)
+    return dict(values)
+
+
+def load_dotenv(path, override=False, interpolate=True, encoding='utf-8'):
+    """Like ``dotenv.load_dotenv(path)``: set the file's variables in ``os.environ``."""
+    values = dotenv_values(path, interpolate=interpolate, override=override, encoding=encoding)
+    if not values:
+        return False
+    for key, value in values.items():
+        if key in os.environ and not override:
+            continue
+        if value is not None:
+            os.environ[key] = value
+    return True
+
+
+class Update(NamedTuple):
+    replaced: list
+    added: list
+    removed: list
+    missing: list
+
+
+def format_line(key, value, quote_mode='always', export=False):
+    """The line ``dotenv.set_key`` would write for ``key``."""
+    if quote_mode not in ('always', 'auto', 'never'):
+        raise ValueError(f"Unknown quote_mode: {quote_mode}")
+    if quote_mode == 'always' or (quote_mode == 'auto' and not value.isalnum()):
+        value = "'{}'".format(value.replace("'", "\\'"))
+    return f"export {key}={value}\n" if export else f"{key}={value}\n"
+
+
+def update(path, values=None, unset=(), quote_mode='always', export=False, encoding='utf-8'):
+    """Set ``values`` and remove the ``unset`` keys in a single rewrite of ``path``.
+
+    Lines are written as ``dotenv.set_key`` writes them: existing bindings
+    are replaced in place, new keys are appended in order and everything
+    else is copied byte for byte. The result goes to a temporary file next
+    to ``path`` that is fsynced and then atomically renamed over it, so
+    readers see either the old file or the new one. A missing file is
+    created unless there is nothing to set.
+    """
+    values = dict(values or {})
+    unset = list(dict.fromkeys(unset))
+    both = values.keys() & set(unset)
+    if both:
+        raise ValueError(f"Keys both set and unset: {', '.join(sorted(both))}")
+    lines = {key: format_line(key, value, quote_mode, export) for key, value in values.items()}
+    unset_keys = set(unset)
+
+    try:
+        with open(path, encoding=encoding) as f:
+            source = f.read()
+        mode = os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        if not values:
+            return Update([], [], [], unset)
+        source, mode = '', 0o600
+
+    out = []
+    seen = set()
+    missing_newline = False
+    for binding in parse_bindings(source):
+        if binding.error:
+            logger.warning("python-dotenv could not parse statement starting at line %s",
+                           binding.original.line)
+        key = binding.key
+        if key in lines:
+            out.append(lines[key])
+            seen.add(key)
+        elif key in unset_keys:
+            seen.add(key)
+        else:
+            out.append(binding.original.string)
+            missing_newline = not binding.original.string.endswith('\n')
+    added = [key for key in lines if key not in seen]
+    if added and missing_newline:
+        out.append('\n')
+    out.extend(lines[key] for key in added)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.env.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding=encoding) as f:
+            f.write(''.join(out))
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    if hasattr(os, 'O_DIRECTORY'):
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+    return Update(
+        replaced=[key for key in lines if key in seen],
+        added=added,
+        removed=[key for key in unset if key in seen],
+        missing=[key for key in unset if key not in seen],
+    )
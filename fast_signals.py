@@ -0,0 +1,150 @@
+import weakref
+from importlib.metadata import version
+from inspect import iscoroutinefunction, ismethod
+
+from blinker import ANY, NamedSignal
+
+# Oldest blinker this is used with (send(..., _async_wrapper=...) came in 1.6).
+MIN_BLINKER = (1, 6)
+
+
+def _sender_id(sender):
+    # Same identity blinker uses: bound methods by (function, instance),
+    # strings and ints by value, everything else by id().
+    if ismethod(sender):
+        return id(sender.__func__), id(sender.__self__)
+    if isinstance(sender, (str, int)):
+        return sender
+    return id(sender)
+
+
+def _pin(sender):
+    try:
+        return weakref.ref(sender)
+    except TypeError:
+        return lambda: sender
+
+
+class SnapshotSignal(NamedSignal):
+    """``NamedSignal`` whose ``send`` reuses a cached receiver list per sender.
+
+    ``Signal.send`` goes through ``receivers_for``, which unions the ANY and
+    per-sender receiver id sets and looks every id up again on each call.
+    Here what ``receivers_for`` resolves to (and whether each receiver is
+    a coroutine function) is kept as a tuple, shared by every sender
+    without receivers of its own, and dropped on any ``connect`` or
+    ``disconnect``. Weak receivers stay weak; a collected one is skipped.
+    Only blinker's public API is used. ``send_async`` is unchanged.
+    """
+
+    def __init__(self, name, doc=None):
+        super().__init__(name, doc)
+        self._specific_senders = set()
+        self._reset_snapshots()
+
+    def _reset_snapshots(self):
+        # key -> (ref to the sender, or None when the key alone identifies it, snapshot)
+        self._snapshots = {}
+        self._version = getattr(self, '_version', 0) + 1
+
+    def _snapshot(self, key, sender):
+        version = self._version
+        # Receivers blinker holds strongly are stored as is; for the rest
+        # keep a weak reference of our own so the snapshot does not keep
+        # them alive.
+        strong = {id(ref) for ref in list(self.receivers.values())}
+        snapshot = []
+        for receiver in self.receivers_for(sender):
+            is_coroutine = iscoroutinefunction(receiver)
+            if id(receiver) in strong:
+                snapshot.append((receiver, False, is_coroutine))
+            else:
+                ref = weakref.WeakMethod(receiver) if ismethod(receiver) else weakref.ref(receiver)
+                snapshot.append((ref, True, is_coroutine))
+        snapshot = tuple(snapshot)
+        # A connect/disconnect on another thread invalidates what we built.
+        if version == self._version:
+            pinned = key is ANY or isinstance(sender, (str, int))
+            self._snapshots[key] = (None if pinned else _pin(sender), snapshot)
+        return snapshot
+
+    def send(self, sender=None, /, *, _async_wrapper=None, **kwargs):
+        if not self.receivers or self.is_muted:
+            return []
+
+        key = _sender_id(sender)
+        if key not in self._specific_senders:
+            key = ANY
+        entry = self._snapshots.get(key)
+        if entry is not None and (entry[0] is None or entry[0]() is sender):
+            snapshot = entry[1]
+        else:
+            # First send, or a receivers' sender was collected and its id reused.
+            snapshot = self._snapshot(key, sender)
+
+        results = []
+        for receiver, weak, is_coroutine in snapshot:
+            if weak:
+                receiver = receiver()
+                if receiver is None:
+                    continue
+            if is_coroutine:
+                if _async_wrapper is None:
+                    raise RuntimeError("Cannot send to a coroutine function.")
+                result = _async_wrapper(receiver)(sender, **kwargs)
+            else:
+                result = receiver(sender, **kwargs)
+            results.append((receiver, result))
+        return results
+
+    # Invalidation
+    def connect(self, receiver, sender=ANY, weak=True):
+        if sender is not ANY:
+            self._specific_senders.add(_sender_id(sender))
+        try:
+            return super().connect(receiver, sender, weak)
+        finally:
+            self._reset_snapshots()
+
+    def disconnect(self, receiver, sender=ANY):
+        try:
+            super().disconnect(receiver, sender)
+        finally:
+            self._reset_snapshots()
+
+
+def _blinker_supported():
+    try:
+        installed = tuple(int(part) for part in version('blinker').split('.')[:2])
+    except ValueError:
+        return False
+    return installed >= MIN_BLINKER
+
+
+def install(*signals):
+    """Switch existing ``NamedSignal`` instances to ``SnapshotSignal`` in place.
+
+    Flask and Flask-Mail create their signals at import time, so they are
+    converted rather than replaced. Only signals nothing is connected to
+    yet are converted (which senders existing receivers were connected
+    for is not public), and nothing is converted on blinker older than
+    ``MIN_BLINKER``; those keep the stock ``send``.
+    """
+    if not _blinker_supported():
+        return
+    for signal in signals:
+        if isinstance(signal, SnapshotSignal):
+            continue
+        if type(signal) is not NamedSignal:
+            raise TypeError(f"Cannot convert {type(signal).__name__} {signal!r}")
+        if signal.receivers:
+            continue
+        signal.__class__ = SnapshotSignal
+        signal._specific_senders = set()
+        signal._reset_snapshots()
+
+
+def install_flask_signals():
+    from flask import signals
+
+    install(*(value for value in vars(signals).values() if type(value) is NamedSignal))
@@ -0,0 +1,134 @@
+from urllib.parse import unquote_plus
+
+from werkzeug.exceptions import BadRequest, RequestEntityTooLarge
+from werkzeug.sansio.multipart import Data, Epilogue, Field, File, MultipartDecoder, NeedData
+
+# Most bytes one character takes in UTF-8.
+_MAX_CHAR_BYTES = 4
+
+
+class FormIngest:
+    """Incremental form parser with per-field and total byte limits.
+
+    ``request.form`` hands the whole body to ``werkzeug.formparser`` with the
+    app-wide limits. This reads ``request.stream`` in ``chunk_size`` pieces,
+    keeps only the ``fields`` it was told about and raises
+    ``RequestEntityTooLarge`` (413) as soon as a field or the body goes over
+    its limit, before the rest is read. A declared ``Content-Length`` over
+    ``max_content_length`` is rejected without reading anything.
+
+    ``fields`` maps field names to their maximum length in characters,
+    counted like an HTML ``maxlength`` (a line break is one character), so
+    the same numbers can go into the form. While streaming, a field is cut
+    off once it has more bytes than that many characters could encode to.
+    ``application/x-www-form-urlencoded`` and ``multipart/form-data`` bodies
+    are supported; file parts and unknown fields are read and discarded.
+    A body of any other (or no) content type is not read and parses as an
+    empty form, as with ``request.form``.
+    """
+
+    def __init__(self, fields, max_content_length=64 * 1024, chunk_size=8192, charset='utf-8'):
+        self.fields = dict(fields)
+        self.max_content_length = max_content_length
+        self.chunk_size = chunk_size
+        self.charset = charset
+        # Longest a still-incomplete urlencoded pair can legitimately get:
+        # every character 4 bytes, each byte percent-encoded, plus the name.
+        self._max_pending = 3 * _MAX_CHAR_BYTES * max(self.fields.values(), default=0) + 256
+
+    def parse(self, request):
+        """Return ``{name: str}`` for the configured fields present in the body."""
+        if request.content_length is not None and request.content_length > self.max_content_length:
+            raise RequestEntityTooLarge()
+        if request.mimetype == 'application/x-www-form-urlencoded':
+            return self._parse_urlencoded(self._chunks(request.stream))
+        if request.mimetype == 'multipart/form-data':
+            boundary = request.mimetype_params.get('boundary')
+            if not boundary:
+                raise BadRequest('Missing multipart boundary.')
+            return self._parse_multipart(self._chunks(request.stream), boundary.encode('latin-1'))
+        return {}
+
+    def _chunks(self, stream):
+        total = 0
+        while True:
+            chunk = stream.read(self.chunk_size)
+            if not chunk:
+                return
+            total += len(chunk)
+            if total > self.max_content_length:
+                raise RequestEntityTooLarge()
+            yield chunk
+
+    def _check_bytes(self, name, size):
+        if size > _MAX_CHAR_BYTES * self.fields[name]:
+            raise RequestEntityTooLarge()
+
+    def _check(self, name, value):
+        # Browsers count a line break as one character but submit CRLF.
+        if len(value) - value.count('\r\n') > self.fields[name]:
+            raise RequestEntityTooLarge()
+
+    def _decode(self, data):
+        return data.decode(self.charset, 'replace')
+
+    # application/x-www-form-urlencoded
+    def _parse_urlencoded(self, chunks):
+        form = {}
+        pending = b''
+        for chunk in chunks:
+            pending += chunk
+            *pairs, pending = pending.split(b'&')
+            for pair in pairs:
+                self._add_pair(form, pair)
+            if len(pending) > self._max_pending:
+                raise RequestEntityTooLarge()
+        self._add_pair(form, pending)
+        return form
+
+    def _add_pair(self, form, pair):
+        if not pair:
+            return
+        name, _, value = pair.partition(b'=')
+        name = unquote_plus(name.decode('latin-1'), encoding=self.charset, errors='replace')
+        if name not in self.fields or name in form:
+            return
+        value = unquote_plus(value.decode('latin-1'), encoding=self.charset, errors='replace')
+        self._check(name, value)
+        form[name] = value
+
+    # multipart/form-data
+    def _parse_multipart(self, chunks, boundary):
+        decoder = MultipartDecoder(boundary, max_form_memory_size=self.max_content_length)
+        form = {}
+        name = None
+        parts = []
+        size = 0
+        chunks = iter(chunks)
+        try:
+            while True:
+                event = decoder.next_event()
+                if isinstance(event, NeedData):
+                    if decoder.complete:
+                        # Body ended before the closing boundary.
+                        break
+                    decoder.receive_data(next(chunks, None))
+                elif isinstance(event, File):
+                    name = None
+                elif isinstance(event, Field):
+                    name = event.name if event.name in self.fields and event.name not in form else None
+                    parts, size = [], 0
+                elif isinstance(event, Data):
+                    if name is not None:
+                        size += len(event.data)
+                        self._check_bytes(name, size)
+                        parts.append(event.data)
+                        if not event.more_data:
+                            value = self._decode(b''.join(parts))
+                            self._check(name, value)
+                            form[name] = value
+                elif isinstance(event, Epilogue):
+                    break
+        except ValueError:
+            raise BadRequest('Malformed multipart body.')
+        return form
@@ -0,0 +1,34 @@
+import gc
+import os
+
+# Load app.py once in the master and let workers inherit it copy-on-write
+wsgi_app = 'app:app'
+preload_app = True
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+
+# No collections while the master builds the app: they would only shuffle
+# objects between generations before everything is frozen in when_ready.
+# This has to happen here: gunicorn preloads the app before on_starting.
+# A HUP runs this file again but not when_ready, so on_reload and post_fork
+# turn collection back on.
+gc.disable()
+
+
+def when_ready(server):
+    import startup
+    from app import app
+
+    startup.preload(app)
+    gc.enable()
+    server.log.info("Preloaded app: %s", ", ".join(
+        f"{name} {ms:.1f} ms" for name, ms in startup.phases))
+
+
+def on_reload(server):
+    gc.enable()
+
+
+def post_fork(server, worker):
+    # Workers always collect, whatever state the master is in.
+    gc.enable()
@@ -0,0 +1,225 @@
+import json
+import os
+import threading
+import time
+from time import perf_counter
+
+from startup import ProcessThread
+
+
+def probe_smtp(host, port, use_tls=True, username=None, password=None, timeout=5.0, noop=True):
+    """Open an SMTP session and walk it as far as asked, without sending mail.
+
+    Runs connect (greeting), EHLO, STARTTLS when ``use_tls``, AUTH when
+    ``username`` is given and NOOP when ``noop``, then QUITs. Returns
+    ``{'ok', 'error', 'timings_ms', 'total_ms', 'checked_at'}`` where
+    ``timings_ms`` has one entry per step that completed.
+    """
+    import smtplib
+    import ssl
+
+    timings = {}
+    start = mark = perf_counter()
+
+    def lap(step):
+        nonlocal mark
+        now = perf_counter()
+        timings[step] = round((now - mark) * 1000, 3)
+        mark = now
+
+    smtp = None
+    error = None
+    try:
+        smtp = smtplib.SMTP(host, port, timeout=timeout)
+        lap('connect')
+        smtp.ehlo()
+        lap('ehlo')
+        if use_tls:
+            smtp.starttls(context=ssl.create_default_context())
+            smtp.ehlo()
+            lap('starttls')
+        if username:
+            smtp.login(username, password or '')
+            lap('auth')
+        if noop:
+            code, _ = smtp.noop()
+            if code != 250:
+                raise smtplib.SMTPResponseException(code, 'NOOP failed')
+            lap('noop')
+    except Exception as e:
+        error = f'{type(e).__name__}: {e}'
+    finally:
+        if smtp is not None:
+            try:
+                smtp.quit()
+            except Exception:
+                smtp.close()
+    return {
+        'ok': error is None,
+        'error': error,
+        'timings_ms': timings,
+        'total_ms': round((perf_counter() - start) * 1000, 3),
+        'checked_at': time.time(),
+    }
+
+
+def _json_response(status, payload):
+    body = json.dumps(payload, separators=(',', ':')).encode()
+    headers = [
+        ('Content-Type', 'application/json'),
+        ('Content-Length', str(len(body))),
+        ('Cache-Control', 'no-store'),
+    ]
+    return status, headers, body
+
+
+class ReadinessChecker:
+    """Background SMTP connectivity check behind ``/readyz``.
+
+    A daemon thread (started on the first probe in each process) runs
+    ``probe_smtp`` with EHLO/NOOP against the configured server every
+    ``interval`` seconds. The app counts as ready while the last check
+    passed, is no older than ``3 * interval`` and fewer than
+    ``max_outbox`` mail sends are in flight. The response for the current
+    state is built once and reused until the state changes.
+    """
+
+    def __init__(self, app, mail, interval=30.0, timeout=5.0, max_outbox=50):
+        self.app = app
+        self.mail = mail
+        self.interval = interval
+        self.timeout = timeout
+        self.max_outbox = max_outbox
+        self.last = None
+        self._version = 0
+        self._cached_key = None
+        self._cached = None
+        self._checker = ProcessThread(self._run, 'readiness-checker')
+
+    def _run(self):
+        while True:
+            config = self.app.config
+            self.last = probe_smtp(config['MAIL_SERVER'], config['MAIL_PORT'],
+                                   use_tls=config['MAIL_USE_TLS'], timeout=self.timeout)
+            self._version += 1
+            time.sleep(self.interval)
+
+    def response(self):
+        self._checker.ensure_running()
+        last = self.last
+        outbox = self.mail.in_flight
+        stale = last is not None and time.time() - last['checked_at'] > 3 * self.interval
+        key = (self._version, outbox, stale)
+        if key == self._cached_key:
+            return self._cached
+
+        if last is None:
+            state = 'starting'
+        elif not last['ok']:
+            state = 'smtp_unreachable'
+        elif stale:
+            state = 'smtp_check_stale'
+        elif outbox >= self.max_outbox:
+            state = 'outbox_full'
+        else:
+            state = 'ready'
+        payload = {
+            'status': state,
+            'outbox': outbox,
+            'smtp': last and {
+                'ok': last['ok'],
+                'error': last['error'],
+                'total_ms': last['total_ms'],
+                'checked_at': round(last['checked_at'], 3),
+            },
+        }
+        cached = _json_response('200 OK' if state == 'ready' else '503 Service Unavailable', payload)
+        self._cached, self._cached_key = cached, key
+        return cached
+
+
+class HealthProbes:
+    """WSGI middleware answering liveness and readiness probes outside Flask.
+
+    ``liveness_path`` always answers 200 with a constant body: the process
+    is up and serving. ``readiness_path`` returns ``checker.response()``,
+    a prebuilt response that never waits on SMTP.
+    """
+
+    def __init__(self, app, checker, liveness_path='/healthz', readiness_path='/readyz'):
+        self.app = app
+        self.checker = checker
+        self.liveness_path = liveness_path
+        self.readiness_path = readiness_path
+        self.alive = _json_response('200 OK', {'status': 'alive'})
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO')
+        if path == self.liveness_path:
+            status, headers, body = self.alive
+        elif path == self.readiness_path:
+            status, headers, body = self.checker.response()
+        else:
+            return self.app(environ, start_response)
+        start_response(status, list(headers))
+        return [] if environ.get('REQUEST_METHOD') == 'HEAD' else [body]
+
+
+class SMTPDiagnostics:
+    """Cached SMTP connect/STARTTLS/AUTH check behind ``/test-email``.
+
+    ``status()`` never blocks: it returns the last result (or ``None``
+    before the first one) and, when that is missing or older than ``ttl``
+    seconds, starts a background ``probe_smtp`` with the configured
+    credentials. Callers arriving while a check runs share it. No message
+    is sent. ``invalidate()`` drops the cached result, and the result of a
+    check already running, after the mail settings change.
+    """
+
+    def __init__(self, app, ttl=60.0, timeout=10.0):
+        self.app = app
+        self.ttl = ttl
+        self.timeout = timeout
+        self.last = None
+        self._lock = threading.Lock()
+        self._generation = 0
+        # pid of the process running a check, so a fork mid-check does not block the child
+        self._running = None
+
+    @property
+    def running(self):
+        return self._running == os.getpid()
+
+    def status(self):
+        last = self.last
+        if last is None or time.time() - last['checked_at'] >= self.ttl:
+            self._start()
+        return last
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self.last = None
+
+    def _start(self):
+        with self._lock:
+            if self.running:
+                return
+            self._running = os.getpid()
+            generation = self._generation
+        threading.Thread(target=self._run, args=(generation,), name='smtp-diagnostics', daemon=True).start()
+
+    def _run(self, generation):
+        result = None
+        try:
+            config = self.app.config
+            result = probe_smtp(config['MAIL_SERVER'], config['MAIL_PORT'],
+                                use_tls=config['MAIL_USE_TLS'],
+                                username=config['MAIL_USERNAME'],
+                                password=config['MAIL_PASSWORD'],
+                                timeout=self.timeout)
+        finally:
+            with self._lock:
+                self._running = None
+                if result is not None and generation == self._generation:
+                    self.last = result
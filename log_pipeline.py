@@ -0,0 +1,190 @@
+import atexit
+import copy
+import json
+import logging
+import queue
+import random
+import sys
+import time
+from logging.handlers import QueueHandler
+
+from startup import ProcessThread
+
+# Put on the queue by ``BatchWriter.close``: write what is pending and stop.
+_STOP = object()
+
+# Attributes every LogRecord has; anything else was passed through ``extra``.
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+_plain_formatter = logging.Formatter()
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message, extra fields."""
+
+    def format(self, record):
+        entry = {
+            'ts': round(record.created, 6),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep every WARNING and above; sample and rate-limit everything below.
+
+    ``sample_rate`` is the fraction of low-level records kept. ``rate`` and
+    ``burst`` define a token bucket per (logger, level): records beyond it
+    are dropped and counted in ``suppressed``.
+    """
+
+    def __init__(self, sample_rate=1.0, rate=None, burst=None, always_level=logging.WARNING):
+        super().__init__()
+        self.sample_rate = sample_rate
+        self.rate = rate
+        self.burst = burst or rate
+        self.always_level = always_level
+        self.suppressed = 0
+        self._buckets = {}
+
+    def filter(self, record):
+        if record.levelno >= self.always_level:
+            return True
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            self.suppressed += 1
+            return False
+        if self.rate is None:
+            return True
+        key = (record.name, record.levelno)
+        now = time.monotonic()
+        tokens, last = self._buckets.get(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - last) * self.rate)
+        if tokens < 1:
+            self._buckets[key] = (tokens, now)
+            self.suppressed += 1
+            return False
+        self._buckets[key] = (tokens - 1, now)
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """``QueueHandler`` that never waits: when the queue is full the record is dropped.
+
+    The background writer thread is started on first use in each process, so
+    a handler configured before gunicorn forks works in every worker.
+    """
+
+    def __init__(self, writer):
+        super().__init__(writer.queue)
+        self.writer = writer
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Resolve the message and traceback now (the frames and arguments
+        # belong to this thread); JSON serialization happens in the writer.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _plain_formatter.formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        self.writer.ensure_running()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class BatchWriter:
+    """Drains a bounded queue on a daemon thread and writes records in batches.
+
+    Only that thread writes to the stream. ``close()`` (registered with
+    ``atexit``) asks it to write everything it holds or is still queued
+    and waits for it; only when no thread runs in this process does it
+    write the queue itself.
+    """
+
+    def __init__(self, stream=None, formatter=None, maxsize=10000, batch_size=200, flush_interval=0.5):
+        self.queue = queue.Queue(maxsize)
+        self.stream = stream or sys.stdout
+        self.formatter = formatter or JsonLinesFormatter()
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._writer = ProcessThread(self._run, 'log-writer')
+
+    def ensure_running(self):
+        self._writer.ensure_running()
+
+    def _run(self):
+        while True:
+            record = self.queue.get()
+            if record is _STOP:
+                return
+            batch = [record]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    record = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if record is _STOP:
+                    self.write(batch)
+                    return
+                batch.append(record)
+            self.write(batch)
+
+    def write(self, batch):
+        lines = []
+        for record in batch:
+            try:
+                lines.append(self.formatter.format(record))
+            except Exception:
+                continue
+        if lines:
+            self.stream.write('\n'.join(lines) + '\n')
+            self.stream.flush()
+
+    def close(self, timeout=2.0):
+        """Write every pending record before the process exits."""
+        if self._writer.running:
+            try:
+                self.queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                return
+            self._writer.thread.join(timeout)
+            return
+        batch = []
+        while True:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        self.write(batch)
+
+
+def setup_logging(name='portfolio', level=logging.INFO, sample_rate=1.0, rate=None, stream=None):
+    """Route logger ``name`` through a sampling filter into a background JSON-lines writer."""
+    writer = BatchWriter(stream=stream)
+    handler = NonBlockingQueueHandler(writer)
+    handler.addFilter(SamplingFilter(sample_rate=sample_rate, rate=rate))
+
+    logger = logging.getLogger(name)
+    logger.setLevel(level)
+    logger.handlers[:] = [handler]
+    logger.propagate = False
+    atexit.register(writer.close)
+    return logger
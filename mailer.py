@@ -0,0 +1,62 @@
+import threading
+
+from fast_signals import install as install_signals
+from request_metrics import timed
+
+
+class LazyMail:
+    """Flask-Mail front end that defers importing the mail stack until first use.
+
+    ``flask_mail`` pulls in ``smtplib`` and most of the ``email`` package, which
+    page views never need. Configuration is read from ``app.config`` when the
+    first message is built or sent.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._mail = None
+        self._lock = threading.Lock()
+        self._in_flight_lock = threading.Lock()
+        self.in_flight = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions['lazy_mail'] = self
+
+    @property
+    def mail(self):
+        if self._mail is None:
+            with self._lock:
+                if self._mail is None:
+                    from flask_mail import Mail, email_dispatched
+                    install_signals(email_dispatched)
+                    self._mail = Mail(self.app)
+        return self._mail
+
+    def reset(self):
+        """Drop the mail state; the next message or send reads ``app.config`` again."""
+        with self._lock:
+            self._mail = None
+
+    @property
+    def loaded(self):
+        return self._mail is not None
+
+    def message(self, **kwargs):
+        """Build a ``flask_mail.Message`` (its defaults come from the mail state)."""
+        self.mail
+        from flask_mail import Message
+        return Message(**kwargs)
+
+    def send(self, message):
+        # ``in_flight`` is the outbox depth reported by the readiness probe.
+        with self._in_flight_lock:
+            self.in_flight += 1
+        try:
+            with timed('mail'):
+                self.mail.send(message)
+        finally:
+            with self._in_flight_lock:
+                self.in_flight -= 1
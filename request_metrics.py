@@ -0,0 +1,233 @@
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from time import perf_counter
+
+from flask import has_request_context, jsonify, request
+from flask.signals import before_render_template, request_started, template_rendered
+
+ENVIRON_KEY = 'portfolio.timing'
+
+# Histogram bucket upper bounds in milliseconds; the last bucket is open-ended.
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+PHASES = ('routing', 'view', 'render', 'mail', 'write', 'total')
+
+
+class RequestTiming:
+    """Phase timestamps for one request, kept in the WSGI environ."""
+
+    __slots__ = ('start', 'started', 'responded', 'route', 'render', 'mail', '_render_start')
+
+    def __init__(self):
+        self.start = perf_counter()
+        self.started = None
+        self.responded = None
+        self.route = None
+        self.render = 0.0
+        self.mail = 0.0
+        self._render_start = None
+
+    def phases(self, end):
+        """Durations in seconds; ``write`` is whatever happened after start_response."""
+        started = self.started or self.start
+        responded = self.responded or end
+        return {
+            'routing': started - self.start,
+            'view': max(0.0, responded - started - self.render - self.mail),
+            'render': self.render,
+            'mail': self.mail,
+            'write': end - responded,
+            'total': end - self.start,
+        }
+
+    def server_timing(self):
+        phases = self.phases(perf_counter())
+        return ', '.join(
+            f'{name};dur={phases[name] * 1000:.3f}'
+            for name in ('routing', 'view', 'render', 'mail')
+        ) + f', app;dur={phases["total"] * 1000:.3f}'
+
+
+def current_timing():
+    if not has_request_context():
+        return None
+    return request.environ.get(ENVIRON_KEY)
+
+
+@contextmanager
+def timed(phase):
+    """Add the time spent in the block to ``phase`` (``'mail'``) of the current request."""
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        timing = current_timing()
+        if timing is not None:
+            setattr(timing, phase, getattr(timing, phase) + perf_counter() - start)
+
+
+class _Histogram:
+    __slots__ = ('count', 'sum', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def observe(self, ms):
+        self.count += 1
+        self.sum += ms
+        self.buckets[bisect_left(BUCKETS_MS, ms)] += 1
+
+
+def _quantile(buckets, count, q):
+    """Upper bound of the bucket holding the ``q`` quantile."""
+    if not count:
+        return 0.0
+    rank = q * count
+    seen = 0
+    for bound, n in zip(BUCKETS_MS, buckets):
+        seen += n
+        if seen >= rank:
+            return bound
+    return float('inf')
+
+
+class RequestMetrics:
+    """Per-route latency histograms and ``Server-Timing`` headers.
+
+    Enabled with ``REQUEST_METRICS``. Each request is split into routing
+    (request context push and URL matching), view, template render, mail
+    send and response write. Every thread records into its own histograms,
+    so the hot path takes no locks; ``REQUEST_METRICS_URL`` merges them.
+
+    Set it up before ``StaticFiles`` wraps the app: static hits are answered
+    outside Flask and their large bodies must reach the server unwrapped
+    for ``sendfile``.
+    """
+
+    def __init__(self, app=None):
+        self._local = threading.local()
+        self._shards = []
+        self._shards_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('REQUEST_METRICS', False)
+        app.config.setdefault('REQUEST_METRICS_URL', '/_metrics')
+        app.extensions['request_metrics'] = self
+        if not app.config['REQUEST_METRICS']:
+            return
+        app.wsgi_app = _TimingMiddleware(app.wsgi_app, self)
+        request_started.connect(self._request_started, app)
+        before_render_template.connect(self._before_render, app)
+        template_rendered.connect(self._after_render, app)
+        app.add_url_rule(app.config['REQUEST_METRICS_URL'], 'request_metrics', self.report)
+
+    # Signal receivers
+    def _request_started(self, sender, **extra):
+        timing = current_timing()
+        if timing is not None:
+            timing.started = perf_counter()
+            timing.route = request.endpoint or '<unmatched>'
+
+    def _before_render(self, sender, template, context, **extra):
+        timing = current_timing()
+        if timing is not None:
+            timing._render_start = perf_counter()
+
+    def _after_render(self, sender, template, context, **extra):
+        timing = current_timing()
+        if timing is not None and timing._render_start is not None:
+            timing.render += perf_counter() - timing._render_start
+            timing._render_start = None
+
+    # Recording
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._shards_lock:
+                self._shards.append(shard)
+        return shard
+
+    def record(self, environ, timing):
+        route = timing.route or '<unmatched>'
+        shard = self._shard()
+        histograms = shard.get(route)
+        if histograms is None:
+            histograms = shard[route] = {phase: _Histogram() for phase in PHASES}
+        for phase, seconds in timing.phases(perf_counter()).items():
+            histograms[phase].observe(seconds * 1000)
+
+    def snapshot(self):
+        """Merge every thread's histograms into ``{route: {phase: stats}}``."""
+        with self._shards_lock:
+            shards = list(self._shards)
+        merged = {}
+        for shard in shards:
+            for route, histograms in shard.copy().items():
+                target = merged.setdefault(route, {phase: _Histogram() for phase in PHASES})
+                for phase, h in histograms.items():
+                    t = target[phase]
+                    t.count += h.count
+                    t.sum += h.sum
+                    t.buckets = [a + b for a, b in zip(t.buckets, h.buckets)]
+        return {
+            route: {
+                phase: {
+                    'count': h.count,
+                    'avg_ms': round(h.sum / h.count, 3) if h.count else 0.0,
+                    'p50_ms': _quantile(h.buckets, h.count, 0.50),
+                    'p95_ms': _quantile(h.buckets, h.count, 0.95),
+                    'p99_ms': _quantile(h.buckets, h.count, 0.99),
+                    'buckets': dict(zip([*map(str, BUCKETS_MS), '+Inf'], h.buckets)),
+                }
+                for phase, h in histograms.items()
+            }
+            for route, histograms in sorted(merged.items())
+        }
+
+    def report(self):
+        return jsonify({'buckets_ms': BUCKETS_MS, 'routes': self.snapshot()})
+
+
+class _TimingMiddleware:
+
+    def __init__(self, app, metrics):
+        self.app = app
+        self.metrics = metrics
+
+    def __call__(self, environ, start_response):
+        timing = environ[ENVIRON_KEY] = RequestTiming()
+
+        def timed_start_response(status, headers, exc_info=None):
+            timing.responded = perf_counter()
+            headers.append(('Server-Timing', timing.server_timing()))
+            return start_response(status, headers, exc_info)
+
+        try:
+            body = self.app(environ, timed_start_response)
+        except BaseException:
+            self.metrics.record(environ, timing)
+            raise
+        return _ClosingBody(body, lambda: self.metrics.record(environ, timing))
+
+
+class _ClosingBody:
+    """Response iterable that reports once the server has finished writing it."""
+
+    def __init__(self, body, on_close):
+        self.body = body
+        self.on_close = on_close
+
+    def __iter__(self):
+        return iter(self.body)
+
+    def close(self):
+        try:
+            if hasattr(self.body, 'close'):
+                self.body.close()
+        finally:
+            self.on_close()
@@ -0,0 +1,145 @@
+import threading
+from collections import OrderedDict
+
+from werkzeug.datastructures import MultiDict
+from werkzeug.routing import Map, MapAdapter
+
+
+class CachedMapAdapter(MapAdapter):
+    """Map adapter that remembers the URLs it has already built and matched.
+
+    Templates call ``url_for('static', ...)`` and ``url_for('home')`` with the
+    same arguments on every render. The cache lives on the map and every key
+    carries the adapter's server name, script root, subdomain and scheme, so
+    adapters bound to different hosts or mount points never share entries.
+
+    Matching a path that belongs to a rule without converters is a single
+    dict lookup; paths matched by rules with converters are remembered in a
+    small LRU. Anything else (redirects, 404/405, websockets, host or
+    subdomain routing) goes through werkzeug's state machine matcher.
+    """
+
+    def match(self, path_info=None, method=None, return_rule=False, query_args=None,
+              websocket=None):
+        map = self.map
+        if path_info is None:
+            path_info = self.path_info
+        method = (method or self.default_method).upper()
+        if websocket is None:
+            websocket = self.websocket
+        if map.host_matching or websocket or self.subdomain != map.default_subdomain:
+            return super().match(path_info, method, return_rule, query_args, websocket)
+
+        map.update()
+        for rule in map._exact_rules.get(path_info, ()):
+            if rule.methods is None or method in rule.methods:
+                return (rule if return_rule else rule.endpoint), {}
+
+        key = (path_info, method)
+        cached = map._recall_match(key)
+        if cached is not None:
+            rule, values = cached
+            return (rule if return_rule else rule.endpoint), dict(values)
+
+        rule, values = super().match(path_info, method, True, query_args, websocket)
+        if rule.arguments:
+            map._remember_match(key, rule, dict(values))
+        return (rule if return_rule else rule.endpoint), values
+
+    def build(self, endpoint, values=None, method=None, force_external=False,
+              append_unknown=True, url_scheme=None):
+        cache = self.map._build_cache
+        try:
+            if isinstance(values, MultiDict):
+                raise TypeError
+            # The value type is part of the key: 1, 1.0 and True hash alike
+            # but are not converted to the same URL.
+            args = tuple((k, type(v), v) for k, v in values.items()) if values else ()
+            key = (self.server_name, self.script_name, self.subdomain, self.url_scheme,
+                   endpoint, args, method, force_external, append_unknown, url_scheme)
+            hash(key)
+        except TypeError:
+            # Lists and MultiDicts expand into repeated query args; not cached.
+            return super().build(endpoint, values, method, force_external, append_unknown, url_scheme)
+
+        rv = cache.get(key)
+        if rv is None:
+            rv = super().build(endpoint, values, method, force_external, append_unknown, url_scheme)
+            if len(cache) >= self.map.build_cache_size:
+                cache.clear()
+            cache[key] = rv
+        return rv
+
+
+class CachedMap(Map):
+    """URL map whose adapters share build and match caches.
+
+    Rules without converters are also indexed by their exact path. Adding a
+    rule clears both caches.
+    """
+
+    adapter_class = CachedMapAdapter
+    build_cache_size = 1024
+    match_cache_size = 256
+
+    def __init__(self, *args, **kwargs):
+        self._build_cache = {}
+        self._exact_rules = {}
+        self._match_cache = OrderedDict()
+        self._match_cache_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+
+    def add(self, rulefactory):
+        super().add(rulefactory)
+        self._build_cache.clear()
+        self._exact_rules = self._index_exact_rules()
+        with self._match_cache_lock:
+            self._match_cache.clear()
+
+    def _index_exact_rules(self):
+        # Endpoints with defaults can trigger redirect_defaults redirects,
+        # which only the full matcher knows how to raise.
+        with_defaults = {rule.endpoint for rule in self._rules if rule.defaults}
+        exact = {}
+        for rule in self._rules:
+            if (rule.arguments or rule.build_only or rule.redirect_to is not None
+                    or rule.websocket or rule.alias or rule.host
+                    or rule.subdomain != self.default_subdomain
+                    or rule.endpoint in with_defaults):
+                continue
+            exact.setdefault(rule.rule, []).append(rule)
+        return exact
+
+    def _recall_match(self, key):
+        with self._match_cache_lock:
+            cached = self._match_cache.get(key)
+            if cached is not None:
+                self._match_cache.move_to_end(key)
+            return cached
+
+    def _remember_match(self, key, rule, values):
+        with self._match_cache_lock:
+            cache = self._match_cache
+            cache[key] = (rule, values)
+            cache.move_to_end(key)
+            if len(cache) > self.match_cache_size:
+                cache.popitem(last=False)
+
+    def _adapt(self, adapter):
+        # Map.bind and Map.bind_to_environ always construct a plain MapAdapter.
+        return self.adapter_class(
+            self,
+            adapter.server_name,
+            adapter.script_name,
+            adapter.subdomain,
+            adapter.url_scheme,
+            adapter.path_info,
+            adapter.default_method,
+            adapter.query_args,
+        )
+
+    def bind(self, *args, **kwargs):
+        return self._adapt(super().bind(*args, **kwargs))
+
+    def bind_to_environ(self, *args, **kwargs):
+        return self._adapt(super().bind_to_environ(*args, **kwargs))
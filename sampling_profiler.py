@@ -0,0 +1,153 @@
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+from werkzeug.middleware.profiler import ProfilerMiddleware
+
+from startup import ProcessThread
+
+
+class SamplingProfilerMiddleware(ProfilerMiddleware):
+    """Production-safe variant of werkzeug's ``ProfilerMiddleware``.
+
+    Instead of running cProfile on every request it works in one of three
+    modes:
+
+    ``'stack'``
+        A ``sample_rate`` fraction of requests is watched; a background
+        thread snapshots their stacks every ``interval`` seconds.
+    ``'timer'``
+        Every in-flight request is watched by the same stack sampler, so
+        overhead is bounded by ``interval`` rather than by traffic.
+    ``'cprofile'``
+        A ``sample_rate`` fraction of requests is handed to
+        ``ProfilerMiddleware`` unchanged (``stream``/``profile_dir`` apply).
+
+    Stack samples are folded into collapsed stacks (``a;b;c count``) over a
+    rolling ``window`` of seconds and served from ``url`` as text, ready for
+    flamegraph.pl or speedscope.
+    """
+
+    def __init__(self, app, sample_rate=0.01, mode='stack', interval=0.005, window=300,
+                 slices=10, url='/_profiler/flamegraph', max_depth=96, **profiler_options):
+        if mode not in ('stack', 'timer', 'cprofile'):
+            raise ValueError(f"Unknown sampling profiler mode: {mode!r}")
+        profiler_options.setdefault('stream', None)
+        super().__init__(app, **profiler_options)
+        self.sample_rate = sample_rate
+        self.mode = mode
+        self.interval = interval
+        self.window = window
+        self.slice_length = window / slices
+        self.url = url
+        self.max_depth = max_depth
+        self.samples = 0
+
+        self._watched = {}
+        self._watched_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._slices = deque()
+        self._labels = {}
+        self._sampler = ProcessThread(self._run, 'sampling-profiler')
+
+    # Request side
+    def __call__(self, environ, start_response):
+        if environ.get('PATH_INFO') == self.url:
+            return self._download(environ, start_response)
+
+        if self.mode != 'timer' and random.random() >= self.sample_rate:
+            return self._app(environ, start_response)
+        if self.mode == 'cprofile':
+            return super().__call__(environ, start_response)
+
+        self._sampler.ensure_running()
+        ident = threading.get_ident()
+        self._watch(ident, 1)
+        try:
+            # Buffer the body so iteration happens on this (watched) thread.
+            app_iter = self._app(environ, start_response)
+            try:
+                body = list(app_iter)
+            finally:
+                if hasattr(app_iter, 'close'):
+                    app_iter.close()
+        finally:
+            self._watch(ident, -1)
+        return body
+
+    def _watch(self, ident, delta):
+        with self._watched_lock:
+            count = self._watched.get(ident, 0) + delta
+            if count:
+                self._watched[ident] = count
+            else:
+                self._watched.pop(ident, None)
+            if self._watched:
+                self._wakeup.set()
+            else:
+                self._wakeup.clear()
+
+    # Sampler thread
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            time.sleep(self.interval)
+            watched = tuple(self._watched)
+            if not watched:
+                continue
+            frames = sys._current_frames()
+            stacks = self._current_slice()
+            for ident in watched:
+                frame = frames.get(ident)
+                if frame is not None:
+                    stacks[self._collapse(frame)] += 1
+                    self.samples += 1
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = (
+                f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+            )
+        return label
+
+    def _collapse(self, frame):
+        labels = []
+        while frame is not None and len(labels) < self.max_depth:
+            labels.append(self._label(frame.f_code))
+            frame = frame.f_back
+        return ';'.join(reversed(labels))
+
+    def _current_slice(self):
+        now = time.monotonic()
+        index = int(now // self.slice_length)
+        if not self._slices or self._slices[-1][0] != index:
+            self._slices.append((index, Counter()))
+            oldest = index - int(self.window // self.slice_length)
+            while self._slices and self._slices[0][0] <= oldest:
+                self._slices.popleft()
+        return self._slices[-1][1]
+
+    # Download
+    def collapsed_stacks(self):
+        """Merge the rolling window into ``{collapsed stack: sample count}``."""
+        merged = Counter()
+        oldest = int(time.monotonic() // self.slice_length) - int(self.window // self.slice_length)
+        for index, stacks in list(self._slices):
+            if index > oldest:
+                merged.update(stacks.copy())
+        return merged
+
+    def _download(self, environ, start_response):
+        stacks = self.collapsed_stacks()
+        body = ''.join(f'{stack} {count}\n' for stack, count in stacks.most_common()).encode()
+        start_response('200 OK', [
+            ('Content-Type', 'text/plain; charset=utf-8'),
+            ('Content-Length', str(len(body))),
+            ('Content-Disposition', 'attachment; filename="flamegraph.folded"'),
+            ('Cache-Control', 'no-store'),
+        ])
+        return [body]
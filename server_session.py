@@ -0,0 +1,194 @@
+import hashlib
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from flask.sessions import SecureCookieSession, SessionInterface, session_json_serializer
+from itsdangerous import BadSignature
+
+from signing import get_signer
+from sqlite_store import SQLiteStore
+
+
+class ServerSideSession(SecureCookieSession):
+    """Session whose data lives on the server; the cookie only carries ``sid``."""
+
+    def __init__(self, initial=None, sid=None, new=False):
+        super().__init__(initial)
+        self.sid = sid
+        self.new = new
+
+
+class MemorySessionStore:
+    """In-process LRU of serialized sessions, each dropped ``ttl`` seconds after its last save."""
+
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, sid):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(sid)
+            if entry is None:
+                return None
+            if entry[1] <= now:
+                del self._data[sid]
+                return None
+            self._data.move_to_end(sid)
+            return entry[0]
+
+    def set(self, sid, data, ttl):
+        with self._lock:
+            self._data[sid] = (data, time.monotonic() + ttl)
+            self._data.move_to_end(sid)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, sid):
+        with self._lock:
+            self._data.pop(sid, None)
+
+
+class SQLiteSessionStore(SQLiteStore):
+    """Serialized sessions shared by every worker through a SQLite file."""
+
+    def __init__(self, path, table='sessions'):
+        super().__init__(path, table)
+
+    def _schema(self, conn):
+        conn.execute(f'CREATE TABLE IF NOT EXISTS {self.table} '
+                     '(sid TEXT PRIMARY KEY, data TEXT NOT NULL, expires REAL NOT NULL)')
+
+    def get(self, sid):
+        row = self._connection().execute(
+            f'SELECT data FROM {self.table} WHERE sid = ? AND expires > ?', (sid, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, sid, data, ttl):
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(f'INSERT OR REPLACE INTO {self.table} (sid, data, expires) VALUES (?, ?, ?)',
+                         (sid, data, now + ttl))
+            if self._should_prune():
+                conn.execute(f'DELETE FROM {self.table} WHERE expires <= ?', (now,))
+
+    def delete(self, sid):
+        with self._transaction() as conn:
+            conn.execute(f'DELETE FROM {self.table} WHERE sid = ?', (sid,))
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """Keeps session data in ``store``; the cookie is just a signed random id.
+
+    Compared to the signed-cookie default, the cookie stays about 50 bytes
+    however much is flashed, and only the id is signed, by a cached
+    ``signing.CachedSigner``. Cookie attributes, expiry and ``Vary: Cookie``
+    follow ``SecureCookieSessionInterface``.
+    The store is only written when the session changed (or is refreshed
+    on every request, per ``SESSION_REFRESH_EACH_REQUEST``).
+    """
+
+    salt = 'server-session'
+    digest_method = staticmethod(hashlib.sha1)
+    key_derivation = 'hmac'
+    serializer = session_json_serializer
+    session_class = ServerSideSession
+
+    def __init__(self, store):
+        self.store = store
+
+    def get_signer(self, app):
+        if not app.secret_key:
+            return None
+        keys = (*(app.config.get('SECRET_KEY_FALLBACKS') or ()), app.secret_key)
+        return get_signer(keys, self.salt, self.key_derivation, self.digest_method)
+
+    def _new_session(self):
+        return self.session_class(sid=secrets.token_urlsafe(16), new=True)
+
+    def open_session(self, app, request):
+        signer = self.get_signer(app)
+        if signer is None:
+            return None
+        cookie = request.cookies.get(self.get_cookie_name(app))
+        if not cookie:
+            return self._new_session()
+        try:
+            sid = signer.unsign(cookie).decode('ascii')
+        except (BadSignature, UnicodeDecodeError):
+            return self._new_session()
+        data = self.store.get(sid)
+        if data is None:
+            # Expired or evicted: start over under a fresh id.
+            return self._new_session()
+        return self.session_class(self.serializer.loads(data), sid=sid)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        secure = self.get_cookie_secure(app)
+        samesite = self.get_cookie_samesite(app)
+        httponly = self.get_cookie_httponly(app)
+
+        if session.accessed:
+            response.vary.add('Cookie')
+
+        if not session:
+            if session.modified:
+                if not session.new:
+                    self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path, secure=secure,
+                                       samesite=samesite, httponly=httponly)
+                response.vary.add('Cookie')
+            return
+
+        if not self.should_set_cookie(app, session):
+            return
+
+        ttl = app.permanent_session_lifetime.total_seconds()
+        self.store.set(session.sid, self.serializer.dumps(dict(session)), ttl)
+        if not session.new and not session.permanent:
+            # Same id, no expiry to push back: the browser's cookie is still right.
+            return
+        response.set_cookie(
+            name,
+            self.get_signer(app).sign(session.sid).decode('ascii'),
+            expires=self.get_expiration_time(app, session),
+            httponly=httponly,
+            domain=domain,
+            path=path,
+            secure=secure,
+            samesite=samesite,
+        )
+        response.vary.add('Cookie')
+
+
+class ServerSideSessions:
+    """Install ``ServerSideSessionInterface`` on an app that has a shared store.
+
+    With ``SESSION_DB`` set, sessions go to that SQLite file, so every
+    worker and instance sees the same sessions. Without it the app keeps
+    Flask's signed-cookie sessions: an in-process store would lose a
+    session whenever the next request lands on another gunicorn worker or
+    serverless instance. A ``store`` can be passed explicitly instead,
+    e.g. ``MemorySessionStore`` for a single-process deployment.
+    """
+
+    def __init__(self, app=None, store=None):
+        self.store = store
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('SESSION_DB', None)
+        store = self.store
+        if store is None and app.config['SESSION_DB']:
+            store = SQLiteSessionStore(app.config['SESSION_DB'])
+        if store is not None:
+            app.session_interface = ServerSideSessionInterface(store)
+        app.extensions['server_side_sessions'] = self
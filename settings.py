@@ -0,0 +1,142 @@
+import logging
+import os
+import threading
+import time
+from typing import NamedTuple, Optional
+
+from config import parse_flag
+from startup import ProcessThread
+
+log = logging.getLogger('portfolio.settings')
+
+
+class Settings(NamedTuple):
+    """Immutable snapshot of the settings app.py takes from ``.env`` and the environment."""
+
+    secret_key: str
+    gmail_user: Optional[str]
+    gmail_app_password: Optional[str]
+    mail_server: str
+    mail_port: int
+    mail_use_tls: bool
+
+    @classmethod
+    def from_mapping(cls, env):
+        return cls(
+            secret_key=env.get('SECRET_KEY') or 'your-secret-key-here',
+            gmail_user=env.get('GMAIL_USER'),
+            gmail_app_password=env.get('GMAIL_APP_PASSWORD'),
+            mail_server=env.get('MAIL_SERVER') or 'smtp.gmail.com',
+            mail_port=int(env.get('MAIL_PORT') or 587),
+            mail_use_tls=parse_flag(env.get('MAIL_USE_TLS'), True),
+        )
+
+    @property
+    def gmail_configured(self):
+        return bool(self.gmail_user and self.gmail_app_password)
+
+
+class SettingsStore:
+    """Holds the current ``Settings`` and swaps in a new one when ``.env`` changes.
+
+    ``current`` is a plain attribute that is replaced whole, so readers never
+    see a half-applied update. ``watch()`` polls the file's mtime and size
+    every ``interval`` seconds and reloads once they have stayed the same
+    for ``debounce`` seconds (editors and deploy tools often write in
+    several steps). Listeners added with ``subscribe`` are called with
+    ``(old, new)`` after each swap.
+
+    Variables set in the real environment keep priority over ``.env``, as
+    with ``load_dotenv()``; ``os.environ`` is updated for the rest so code
+    that still calls ``os.getenv`` sees the new values too.
+    """
+
+    def __init__(self, path=None, interval=2.0, debounce=0.5):
+        self.path = path
+        self.interval = interval
+        self.debounce = debounce
+        self.reloads = 0
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._stopped = False
+
+        self._file_values = self._read_file()
+        self._process_env = {
+            key: value for key, value in os.environ.items()
+            if self._file_values.get(key) != value
+        }
+        self._stat = self._stat_file()
+        self.current = Settings.from_mapping({**self._file_values, **self._process_env})
+
+    def subscribe(self, listener):
+        self._listeners.append(listener)
+        return listener
+
+    def _read_file(self):
+        if not self.path or not os.path.isfile(self.path):
+            return {}
+        from envfile import dotenv_values
+        return dotenv_values(self.path)
+
+    def _stat_file(self):
+        try:
+            st = os.stat(self.path) if self.path else None
+        except OSError:
+            return None
+        return st and (st.st_mtime_ns, st.st_size)
+
+    def reload(self):
+        """Re-read ``.env`` now; return ``True`` if the snapshot changed."""
+        with self._lock:
+            old_values = self._file_values
+            new_values = self._read_file()
+            for key in old_values.keys() - new_values.keys() - self._process_env.keys():
+                os.environ.pop(key, None)
+            for key, value in new_values.items():
+                if key not in self._process_env and value is not None:
+                    os.environ[key] = value
+            self._file_values = new_values
+
+            old = self.current
+            new = Settings.from_mapping({**new_values, **self._process_env})
+            if new == old:
+                return False
+            self.current = new
+            self.reloads += 1
+        for listener in self._listeners:
+            listener(old, new)
+        return True
+
+    # Watcher thread
+    def watch(self):
+        """Start polling ``.env`` in a daemon thread (again in each forked worker)."""
+        if self._watcher is not None:
+            return
+        self._watcher = ProcessThread(self._run, 'settings-watcher')
+        self._watcher.start(every_process=True)
+
+    def stop(self):
+        """Stop polling (within one interval), in this process and workers forked later."""
+        self._stopped = True
+
+    def _run(self):
+        pending = None
+        while True:
+            time.sleep(self.interval if pending is None else self.debounce)
+            if self._stopped:
+                return
+            stat = self._stat_file()
+            if stat == self._stat:
+                pending = None
+                continue
+            if stat != pending:
+                # Changed since the last look; wait until it settles.
+                pending = stat
+                continue
+            self._stat = stat
+            pending = None
+            try:
+                self.reload()
+            except Exception:
+                log.exception("Reloading settings from %s failed", self.path)
@@ -0,0 +1,57 @@
+import functools
+import hashlib
+import hmac
+
+from itsdangerous import Signer
+from itsdangerous.encoding import base64_decode, base64_encode, want_bytes
+from itsdangerous.signer import HMACAlgorithm
+
+
+class CachedSigner(Signer):
+    """``Signer`` that derives its keys once and signs with pre-keyed HMACs.
+
+    ``Signer`` derives the key from the secret and salt on every
+    ``get_signature`` and ``verify_signature``, once per rotation key, and
+    then keys a fresh HMAC. Here every key is derived and loaded into an
+    HMAC object up front; each message works on a ``.copy()`` of it.
+    Signatures are identical to ``Signer``'s. Only the default HMAC
+    algorithm is supported.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if type(self.algorithm) is not HMACAlgorithm:
+            raise TypeError("CachedSigner only supports HMACAlgorithm")
+        # Newest key first: it signs, and most cookies verify against it.
+        self._macs = [
+            hmac.new(self.derive_key(key), digestmod=self.algorithm.digest_method)
+            for key in reversed(self.secret_keys)
+        ]
+
+    def get_signature(self, value):
+        mac = self._macs[0].copy()
+        mac.update(want_bytes(value))
+        return base64_encode(mac.digest())
+
+    def verify_signature(self, value, sig):
+        try:
+            sig = base64_decode(sig)
+        except Exception:
+            return False
+        value = want_bytes(value)
+        for keyed in self._macs:
+            mac = keyed.copy()
+            mac.update(value)
+            if hmac.compare_digest(sig, mac.digest()):
+                return True
+        return False
+
+
+@functools.lru_cache(maxsize=32)
+def get_signer(secret_keys, salt, key_derivation='hmac', digest_method=hashlib.sha1):
+    """Shared ``CachedSigner`` per (secret keys, salt, key derivation, digest).
+
+    ``secret_keys`` is a tuple, oldest first, like ``Signer``'s list.
+    """
+    return CachedSigner(list(secret_keys), salt=salt, key_derivation=key_derivation,
+                        digest_method=digest_method)
@@ -0,0 +1,52 @@
+import os
+import threading
+from contextlib import contextmanager
+
+
+class SQLiteStore:
+    """Base for state shared between workers through a SQLite file.
+
+    Each thread gets its own connection, reopened after a fork. Subclasses
+    create their tables in ``_schema`` and wrap writes in ``_transaction``.
+    ``sqlite3`` is only imported when the first connection is opened, so
+    defining a store costs nothing at startup when none is configured.
+    """
+
+    prune_every = 100
+
+    def __init__(self, path, table):
+        self.path = path
+        self.table = table
+        self._local = threading.local()
+        self._writes = 0
+
+    def _schema(self, conn):
+        raise NotImplementedError
+
+    def _connection(self):
+        # SQLite connections must not cross fork or thread boundaries.
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            import sqlite3
+
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._schema(conn)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    def _should_prune(self):
+        self._writes += 1
+        return self._writes % self.prune_every == 0
@@ -0,0 +1,134 @@
+"""Startup timing and pre-fork warm-up for app.py.
+
+Set ``STARTUP_TIMINGS=1`` to print how long each startup phase of app.py
+took, or run ``python startup.py [module]`` for a summary of
+``python -X importtime`` grouped by top-level package. ``preload()`` is
+called by gunicorn.conf.py in the master process before workers fork;
+background threads go through ``ProcessThread`` so each worker gets its own.
+"""
+import gc
+import os
+import re
+import subprocess
+import sys
+import threading
+from contextlib import contextmanager
+from time import perf_counter
+
+_started = perf_counter()
+phases = []
+
+
+@contextmanager
+def phase(name):
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        phases.append((name, (perf_counter() - start) * 1000))
+
+
+def report():
+    total = (perf_counter() - _started) * 1000
+    print(f"⏱️ Startup finished in {total:.1f} ms")
+    for name, ms in phases:
+        print(f"⏱️   {name:<20} {ms:8.1f} ms")
+
+
+def preload(app):
+    """Build everything workers would otherwise build on their first requests.
+
+    Runs in the gunicorn master: imports the mail stack, compiles every
+    template into the Jinja cache and compiles the URL map, then moves all
+    surviving objects into the permanent GC generation so collections in
+    the forked workers don't touch (and copy) the shared pages.
+    """
+    with phase('preload mail'):
+        mail = app.extensions.get('lazy_mail')
+        if mail is not None:
+            mail.mail
+    with phase('compile templates'):
+        for name in app.jinja_env.list_templates():
+            app.jinja_env.get_template(name)
+        email_templates = app.extensions.get('email_templates')
+        if email_templates is not None:
+            email_templates.load()
+    with phase('compile url map'):
+        app.url_map.update()
+    gc.collect()
+    gc.freeze()
+
+
+class ProcessThread:
+    """A daemon thread that runs ``target`` once in each process.
+
+    Threads do not survive fork, and app.py is imported once in the
+    gunicorn master. ``ensure_running()`` is cheap enough for hot paths: it
+    compares the pid and starts the thread the first time it is called in
+    a process. ``start(every_process=True)`` also starts it right after
+    each fork, for threads no request would otherwise wake.
+    """
+
+    def __init__(self, target, name, args=()):
+        self.target = target
+        self.name = name
+        self.args = args
+        self.thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def ensure_running(self):
+        if self._pid == os.getpid():
+            return self.thread
+        with self._lock:
+            if self._pid != os.getpid():
+                self.thread = threading.Thread(target=self.target, args=self.args, name=self.name, daemon=True)
+                self.thread.start()
+                self._pid = os.getpid()
+        return self.thread
+
+    def start(self, every_process=False):
+        if every_process and hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self.ensure_running)
+        return self.ensure_running()
+
+    @property
+    def running(self):
+        """Whether this process's thread is alive."""
+        return self._pid == os.getpid() and self.thread.is_alive()
+
+
+_IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def importtime_summary(module='app', top=15):
+    """Import ``module`` in a fresh interpreter with ``-X importtime``.
+
+    Returns ``(total_us, [(package, self_us), ...])`` with the self time of
+    every imported module summed per top-level package, slowest first.
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, check=True,
+    )
+    packages = {}
+    total = 0
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match is None:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        package = name.split('.')[0]
+        packages[package] = packages.get(package, 0) + int(self_us)
+        if len(indent) == 1:
+            total += int(cumulative_us)
+    ranked = sorted(packages.items(), key=lambda item: item[1], reverse=True)
+    return total, ranked[:top]
+
+
+if __name__ == '__main__':
+    target = sys.argv[1] if len(sys.argv) > 1 else 'app'
+    total_us, ranked = importtime_summary(target)
+    print(f"import {target}: {total_us / 1000:.1f} ms")
+    for package, self_us in ranked:
+        print(f"  {package:<24} {self_us / 1000:8.1f} ms")
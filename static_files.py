@@ -0,0 +1,145 @@
+import mimetypes
+import os
+from datetime import datetime, timedelta, timezone
+from zlib import adler32
+
+from werkzeug.http import http_date, is_resource_modified, parse_range_header
+
+
+class StaticAsset:
+    """One file under the static folder, with its response headers built up front."""
+
+    __slots__ = ('path', 'size', 'etag', 'last_modified', 'headers', 'data')
+
+    def __init__(self, path, stat, mimetype, cache_control, keep_in_memory):
+        self.path = path
+        self.size = stat.st_size
+        check = adler32(path.encode()) & 0xFFFFFFFF
+        self.etag = f'"{stat.st_mtime}-{stat.st_size}-{check}"'
+        self.last_modified = datetime.fromtimestamp(int(stat.st_mtime), timezone.utc)
+        self.headers = [
+            ('Content-Type', mimetype),
+            ('ETag', self.etag),
+            ('Last-Modified', http_date(self.last_modified)),
+            ('Cache-Control', cache_control),
+            ('Accept-Ranges', 'bytes'),
+        ]
+        self.data = None
+        if keep_in_memory:
+            with open(path, 'rb') as f:
+                self.data = f.read()
+
+
+class StaticFiles:
+    """WSGI middleware that answers ``/static/...`` before Flask sees the request.
+
+    The static folder is indexed once at startup. Files up to
+    ``max_memory_size`` bytes are kept in memory; larger ones are streamed
+    through the server's ``wsgi.file_wrapper``, which gunicorn turns into
+    ``os.sendfile``. ``ETag``/``If-Modified-Since`` and single byte ranges
+    are supported. Unknown paths and non-GET/HEAD methods fall through to
+    the wrapped app, so files added after startup are still served by Flask.
+    """
+
+    chunk_size = 64 * 1024
+
+    def __init__(self, app, directory, url_path='/static', max_memory_size=256 * 1024,
+                 max_age=None):
+        self.app = app
+        self.directory = directory
+        self.prefix = url_path.rstrip('/') + '/'
+        self.max_memory_size = max_memory_size
+        if isinstance(max_age, timedelta):
+            max_age = int(max_age.total_seconds())
+        if max_age:
+            self.cache_control = f'public, max-age={max_age}'
+        else:
+            self.cache_control = 'no-cache'
+        self.assets = self._index()
+
+    def _index(self):
+        assets = {}
+        for root, _dirs, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                rel = os.path.relpath(path, self.directory).replace(os.sep, '/')
+                stat = os.stat(path)
+                mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+                if mimetype.startswith('text/') or mimetype.endswith(('javascript', 'json')):
+                    mimetype += '; charset=utf-8'
+                assets[rel] = StaticAsset(path, stat, mimetype, self.cache_control,
+                                          stat.st_size <= self.max_memory_size)
+        return assets
+
+    @property
+    def memory_size(self):
+        return sum(len(asset.data) for asset in self.assets.values() if asset.data is not None)
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        method = environ.get('REQUEST_METHOD')
+        if not path.startswith(self.prefix) or method not in ('GET', 'HEAD'):
+            return self.app(environ, start_response)
+
+        # PATH_INFO holds the raw UTF-8 bytes decoded as latin-1 (PEP 3333).
+        name = path[len(self.prefix):].encode('latin-1').decode('utf-8', 'replace')
+        asset = self.assets.get(name)
+        if asset is None:
+            return self.app(environ, start_response)
+
+        if not is_resource_modified(environ, etag=asset.etag, last_modified=asset.last_modified):
+            start_response('304 Not Modified', asset.headers[1:])
+            return []
+
+        start, stop = 0, asset.size
+        status = '200 OK'
+        headers = list(asset.headers)
+        range_header = environ.get('HTTP_RANGE')
+        if range_header and self._if_range_matches(environ, asset):
+            byte_range = parse_range_header(range_header)
+            span = byte_range.range_for_length(asset.size) if byte_range else None
+            if span is None and byte_range is not None and len(byte_range.ranges) == 1:
+                start_response('416 Range Not Satisfiable', [
+                    ('Content-Range', f'bytes */{asset.size}'),
+                    ('Content-Length', '0'),
+                ])
+                return []
+            if span is not None:
+                start, stop = span
+                status = '206 Partial Content'
+                headers.append(('Content-Range', f'bytes {start}-{stop - 1}/{asset.size}'))
+        headers.append(('Content-Length', str(stop - start)))
+        start_response(status, headers)
+
+        if method == 'HEAD':
+            return []
+        if asset.data is not None:
+            return [asset.data[start:stop] if status != '200 OK' else asset.data]
+        return self._stream(environ, asset.path, start, stop)
+
+    @staticmethod
+    def _if_range_matches(environ, asset):
+        if_range = environ.get('HTTP_IF_RANGE')
+        if not if_range:
+            return True
+        return if_range.strip() in (asset.etag, http_date(asset.last_modified))
+
+    def _stream(self, environ, path, start, stop):
+        f = open(path, 'rb')
+        f.seek(start)
+        file_wrapper = environ.get('wsgi.file_wrapper')
+        if file_wrapper is not None and stop == os.fstat(f.fileno()).st_size:
+            # gunicorn hands file wrappers to os.sendfile from the current
+            # position; other servers read them to EOF, so only ranges that
+            # end at EOF go this way.
+            return file_wrapper(f, self.chunk_size)
+        return self._read_chunks(f, stop - start)
+
+    def _read_chunks(self, f, length):
+        with f:
+            while length > 0:
+                chunk = f.read(min(self.chunk_size, length))
+                if not chunk:
+                    break
+                length -= len(chunk)
+                yield chunk
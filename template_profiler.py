@@ -0,0 +1,214 @@
+import threading
+from collections import deque
+from time import perf_counter
+
+from flask import g, has_app_context, jsonify
+from flask.signals import before_render_template, template_rendered
+from flask.templating import Environment
+from jinja2 import Template
+
+
+class _Stats:
+    """Running count / total / max of a duration in milliseconds."""
+
+    __slots__ = ('count', 'total', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms):
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'total_ms': round(self.total, 3),
+            'avg_ms': round(self.total / self.count, 3) if self.count else 0.0,
+            'max_ms': round(self.max, 3),
+        }
+
+
+class _RequestProfile:
+    """Everything recorded while rendering templates for one request."""
+
+    __slots__ = ('templates', 'blocks', 'compiles', 'url_for_calls', '_starts')
+
+    def __init__(self):
+        self.templates = []
+        self.blocks = {}
+        self.compiles = []
+        self.url_for_calls = 0
+        self._starts = []
+
+    def as_dict(self):
+        return {
+            'templates': [{'name': name, 'ms': round(ms, 3)} for name, ms in self.templates],
+            'blocks': {key: round(ms, 3) for key, ms in self.blocks.items()},
+            'compiles': [{'name': name, 'ms': round(ms, 3)} for name, ms in self.compiles],
+            'url_for_calls': self.url_for_calls,
+        }
+
+
+def _current_profile():
+    if not has_app_context():
+        return None
+    return g.get('_template_profile')
+
+
+# JINJA HOOKS
+def _timed_block(template_name, block_name, render_block):
+    key = f'{template_name}:{block_name}'
+
+    def render(context, *args, **kwargs):
+        start = perf_counter()
+        try:
+            yield from render_block(context, *args, **kwargs)
+        finally:
+            ms = (perf_counter() - start) * 1000
+            profiler = context.environment.template_profiler
+            if profiler is not None:
+                profiler._record('blocks', key, ms)
+            profile = _current_profile()
+            if profile is not None:
+                profile.blocks[key] = profile.blocks.get(key, 0.0) + ms
+
+    render.__name__ = render_block.__name__
+    return render
+
+
+class ProfiledTemplate(Template):
+    """Template whose block render functions report their own timings."""
+
+    @classmethod
+    def _from_namespace(cls, environment, namespace, globals):
+        template = super()._from_namespace(environment, namespace, globals)
+        template.blocks = {
+            name: _timed_block(template.name, name, render_block)
+            for name, render_block in template.blocks.items()
+        }
+        return template
+
+
+class ProfilingEnvironment(Environment):
+    """Flask environment that times template compilation and counts ``url_for``."""
+
+    template_class = ProfiledTemplate
+    template_profiler = None
+
+    def make_globals(self, d):
+        # Flask installs ``url_for`` after the environment is built, so the
+        # counting wrapper is layered over each template's globals instead.
+        return super().make_globals({'url_for': self._counting_url_for, **(d or {})})
+
+    def _counting_url_for(self, *args, **kwargs):
+        profile = _current_profile()
+        if profile is not None:
+            profile.url_for_calls += 1
+        return self.globals['url_for'](*args, **kwargs)
+
+    def compile(self, source, name=None, filename=None, raw=False, defer_init=False):
+        start = perf_counter()
+        try:
+            return super().compile(source, name, filename, raw, defer_init)
+        finally:
+            ms = (perf_counter() - start) * 1000
+            if self.template_profiler is not None:
+                self.template_profiler._record('compiles', name or '<string>', ms)
+            profile = _current_profile()
+            if profile is not None:
+                profile.compiles.append((name or '<string>', ms))
+
+
+# EXTENSION
+class TemplateProfiler:
+    """Opt-in per-request template timing, enabled with ``TEMPLATE_PROFILING``.
+
+    Records compile time, per-template and per-block render time and the
+    number of ``url_for`` calls made from templates. Each request's numbers
+    are sent back as ``Server-Timing`` entries and aggregated totals are
+    served as JSON from ``TEMPLATE_PROFILING_URL``.
+    """
+
+    def __init__(self, app=None, history=50):
+        self._lock = threading.Lock()
+        self.templates = {}
+        self.blocks = {}
+        self.compiles = {}
+        self.recent = deque(maxlen=history)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('TEMPLATE_PROFILING', False)
+        app.config.setdefault('TEMPLATE_PROFILING_URL', '/_profiler/templates')
+        app.extensions['template_profiler'] = self
+        if not app.config['TEMPLATE_PROFILING']:
+            return
+        if 'jinja_env' in app.__dict__:
+            raise RuntimeError('TemplateProfiler must be set up before the first template is rendered.')
+
+        app.jinja_environment = type('AppProfilingEnvironment', (ProfilingEnvironment,),
+                                     {'template_profiler': self})
+        before_render_template.connect(self._before_render, app)
+        template_rendered.connect(self._after_render, app)
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.add_url_rule(app.config['TEMPLATE_PROFILING_URL'], 'template_profiler', self.report)
+
+    def _record(self, kind, key, ms):
+        with self._lock:
+            table = getattr(self, kind)
+            stats = table.get(key)
+            if stats is None:
+                stats = table[key] = _Stats()
+            stats.add(ms)
+
+    # Signal receivers
+    def _start_request(self):
+        g._template_profile = _RequestProfile()
+
+    def _before_render(self, sender, template, context, **extra):
+        profile = _current_profile()
+        if profile is not None:
+            profile._starts.append(perf_counter())
+
+    def _after_render(self, sender, template, context, **extra):
+        profile = _current_profile()
+        if profile is None or not profile._starts:
+            return
+        ms = (perf_counter() - profile._starts.pop()) * 1000
+        profile.templates.append((template.name, ms))
+        self._record('templates', template.name, ms)
+
+    def _finish_request(self, response):
+        profile = g.pop('_template_profile', None)
+        if profile is None or not (profile.templates or profile.compiles):
+            return response
+        self.recent.append(profile.as_dict())
+
+        entries = []
+        for i, (name, ms) in enumerate(profile.templates):
+            entries.append(f'tpl{i};dur={ms:.3f};desc="{name}"')
+        compile_ms = sum(ms for _, ms in profile.compiles)
+        if profile.compiles:
+            entries.append(f'tpl-compile;dur={compile_ms:.3f};desc="{len(profile.compiles)} templates"')
+        for i, (key, ms) in enumerate(profile.blocks.items()):
+            entries.append(f'blk{i};dur={ms:.3f};desc="{key}"')
+        entries.append(f'url-for;desc="{profile.url_for_calls} calls"')
+        response.headers.add('Server-Timing', ', '.join(entries))
+        return response
+
+    def report(self):
+        """JSON view of the aggregated timings and the most recent requests."""
+        with self._lock:
+            return jsonify({
+                'templates': {name: s.as_dict() for name, s in self.templates.items()},
+                'blocks': {key: s.as_dict() for key, s in self.blocks.items()},
+                'compiles': {name: s.as_dict() for name, s in self.compiles.items()},
+                'recent': list(self.recent),
+            })